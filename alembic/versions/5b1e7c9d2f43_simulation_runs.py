@@ -0,0 +1,52 @@
+"""Simulation runs
+
+Revision ID: 5b1e7c9d2f43
+Revises: 28898405635c
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c9d2f43'
+down_revision: Union[str, None] = '28898405635c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('simulation_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('model_id', sa.Integer(), nullable=True),
+    sa.Column('sub_area_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('time_limit', sa.Float(), nullable=True),
+    sa.Column('engine', sa.String(), nullable=True),
+    sa.Column('cost', sa.Float(), nullable=True),
+    sa.Column('sample_count', sa.Integer(), nullable=True),
+    sa.Column('checkpoint', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['model_id'], ['models.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['sub_area_id'], ['subject_areas.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id')
+    )
+    op.create_index('ix_simulation_runs_model_id_id', 'simulation_runs', ['model_id', 'id'])
+    op.create_table('simulation_samples',
+    sa.Column('run_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('time', sa.Float(), nullable=True),
+    sa.Column('res_id', sa.Integer(), nullable=True),
+    sa.Column('value', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['run_id'], ['simulation_runs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('run_id', 'seq')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('simulation_samples')
+    op.drop_index('ix_simulation_runs_model_id_id', table_name='simulation_runs')
+    op.drop_table('simulation_runs')
@@ -0,0 +1,51 @@
+"""Lookup indexes
+
+Revision ID: 8c4d2a6e1f57
+Revises: 5b1e7c9d2f43
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4d2a6e1f57'
+down_revision: Union[str, None] = '5b1e7c9d2f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # уникальные индексы соответствуют проверкам в shared/validation.py;
+    # перед обновлением в БД не должно быть повторяющихся имен
+    op.create_index('ix_subject_areas_name', 'subject_areas', ['name'], unique=True)
+    op.create_index('ix_models_sub_area_id_name', 'models', ['sub_area_id', 'name'], unique=True)
+    op.create_index('ix_resources_sub_area_id_name', 'resources', ['sub_area_id', 'name'], unique=True)
+    op.create_index('ix_resources_sub_area_id_sys_name', 'resources', ['sub_area_id', 'sys_name'])
+    op.create_index('ix_nodes_model_id_name', 'nodes', ['model_id', 'name'])
+    op.create_index('ix_relations_model_id', 'relations', ['model_id'])
+    op.create_index('ix_relations_source_id', 'relations', ['source_id'])
+    op.create_index('ix_relations_target_id', 'relations', ['target_id'])
+    op.create_index('ix_node_details_node_id', 'node_details', ['node_id'])
+    op.create_index('ix_node_resources_node_id_res_in_out', 'node_resources', ['node_id', 'res_in_out'])
+    op.create_index('ix_node_resources_model_id', 'node_resources', ['model_id'])
+    op.create_index('ix_charts_model_id', 'charts', ['model_id'])
+    op.create_index('ix_model_controls_model_id', 'model_controls', ['model_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_model_controls_model_id', table_name='model_controls')
+    op.drop_index('ix_charts_model_id', table_name='charts')
+    op.drop_index('ix_node_resources_model_id', table_name='node_resources')
+    op.drop_index('ix_node_resources_node_id_res_in_out', table_name='node_resources')
+    op.drop_index('ix_node_details_node_id', table_name='node_details')
+    op.drop_index('ix_relations_target_id', table_name='relations')
+    op.drop_index('ix_relations_source_id', table_name='relations')
+    op.drop_index('ix_relations_model_id', table_name='relations')
+    op.drop_index('ix_nodes_model_id_name', table_name='nodes')
+    op.drop_index('ix_resources_sub_area_id_sys_name', table_name='resources')
+    op.drop_index('ix_resources_sub_area_id_name', table_name='resources')
+    op.drop_index('ix_models_sub_area_id_name', table_name='models')
+    op.drop_index('ix_subject_areas_name', table_name='subject_areas')
@@ -0,0 +1,125 @@
+"""Замеры производительности симуляции и API на сгенерированной модели.
+
+Запуск: python -m benchmarks [--nodes 200] [--resources 20] [--horizon 5000] [--save base.json]
+        python -m benchmarks --compare base.json  - код возврата 1, если есть ухудшения"""
+import argparse
+import os
+import sys
+import tempfile
+
+# замеры всегда идут на временной БД SQLite; адрес нужно задать до импорта модулей db
+_database_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir.name, 'benchmarks.db')}"
+# кэш результатов отключен, чтобы /start/ каждый раз проводил симуляцию
+os.environ["SIMULATION_CACHE_SIZE"] = "0"
+os.environ.pop("SIMULATION_CACHE_DIR", None)
+
+from benchmarks.generator import generate_model, seed_database, SyntheticModel
+from benchmarks.runner import measure, format_header, format_result, save_results, compare_results
+from shared.enums.report_levels import ReportLevel
+from shared.enums.simulation_engines import SimulationEngine
+from simulation.codegen import compile_cycle
+from simulation.sim import get_events_list, get_report, ModelPlan, SimulationRun
+from simulation.topological_sort import get_sorted_node_ids
+
+def get_simulation_benchmarks(model: SyntheticModel, horizon: int) -> list:
+    """Возвращает замеры движка симуляции: (название, функция)"""
+    node_ids = [node.id for node in model.nodes]
+    events = get_events_list(model.nodes, model.relations)
+    plan = ModelPlan(events, model.resources)
+
+    run = SimulationRun(plan.events, horizon, plan.resources, ReportLevel.NONE, plan=plan)
+    compiled_events = run.compile_events()
+
+    def change_resources():
+        # один проход по всем событиям модели
+        for _, operations_in, operations_out in compiled_events:
+            run.change_resources(operations_in, 0)
+            run.change_resources(operations_out, 0)
+        run.results.clear()
+
+    benchmarks = [
+        ("get_sorted_node_ids", lambda: get_sorted_node_ids(model.relations, node_ids)),
+        ("ModelPlan", lambda: ModelPlan(events, model.resources)),
+        ("change_resources", change_resources),
+        ("compile_cycle", lambda: compile_cycle(plan.compiled_events, plan.state)),
+    ]
+    for engine in SimulationEngine:
+        for level in (ReportLevel.FULL, ReportLevel.NONE):
+            benchmarks.append((f"get_report[{engine.value}, {level.name}]",
+                               lambda engine=engine, level=level: get_report(events, horizon, model.resources,
+                                                                             level, engine, plan=plan)))
+    return benchmarks
+
+def get_api_benchmarks(model: SyntheticModel, horizon: int) -> list:
+    """Возвращает замеры эндпоинта /start/ на БД SQLite: (название, функция)"""
+    from fastapi.testclient import TestClient
+    import main
+    from fastapi_sqlalchemy import db
+    from db.database import SessionLocal
+    from simulation.cache import simulation_cache
+
+    session = SessionLocal()
+    try:
+        seed_database(session, model)
+    finally:
+        session.close()
+    client = TestClient(main.app)
+
+    def start(report_level: ReportLevel, cold: bool = False):
+        if cold:
+            # модель загружается из БД заново; версия данных меняется в БД, поэтому нужна сессия
+            with db():
+                simulation_cache.invalidate()
+        response = client.get(f"/start/1/1/?time_limit={horizon}&report_level={int(report_level)}")
+        response.raise_for_status()
+
+    return [
+        ("/start/ [FULL]", lambda: start(ReportLevel.FULL)),
+        ("/start/ [NONE]", lambda: start(ReportLevel.NONE)),
+        ("/start/ [NONE, загрузка модели]", lambda: start(ReportLevel.NONE, cold=True)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Замеры производительности BPsim")
+    parser.add_argument("--nodes", type=int, default=200, help="количество узлов модели")
+    parser.add_argument("--resources", type=int, default=20, help="количество ресурсов ПО")
+    parser.add_argument("--formulas", type=int, default=2, help="наибольшее число формул на входе и выходе узла")
+    parser.add_argument("--resource-operands", type=float, default=0.3, help="доля формул с ресурсом в операнде")
+    parser.add_argument("--errors", type=float, default=0.0, help="доля формул с ошибкой")
+    parser.add_argument("--extra-relations", type=float, default=0.0, help="доля узлов с дополнительной связью")
+    parser.add_argument("--horizon", type=int, default=5000, help="время симуляции")
+    parser.add_argument("--rounds", type=int, default=5, help="количество повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="выполнить только замеры, в названии которых есть эта строка")
+    parser.add_argument("--no-api", action="store_true", help="не замерять API")
+    parser.add_argument("--save", help="сохранить результаты в json")
+    parser.add_argument("--compare", help="сравнить с результатами из json")
+    parser.add_argument("--threshold", type=float, default=0.1, help="допустимое ухудшение, доля")
+    args = parser.parse_args()
+
+    model = generate_model(args.nodes, args.resources, args.formulas, args.resource_operands, args.errors,
+                           args.extra_relations, seed=args.seed)
+    benchmarks = get_simulation_benchmarks(model, args.horizon)
+    if not args.no_api:
+        benchmarks += get_api_benchmarks(model, args.horizon)
+    if args.only:
+        benchmarks = [(name, function) for name, function in benchmarks if args.only in name]
+
+    results = []
+    print(format_header())
+    for name, function in benchmarks:
+        results.append(measure(name, function, args.rounds))
+        print(format_result(results[-1]), flush=True)
+
+    if args.save:
+        save_results(results, args.save)
+    if args.compare:
+        regressions = compare_results(results, args.compare, args.threshold)
+        for regression in regressions:
+            print(f"Ухудшение: {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import random
+
+from db.models import SubjectArea, Model, ResourceType, Resource, Node, NodeDetail, NodeRes, Relation
+from simulation.types import SimulationNodedata, SimulationNodeRes, SimulationResource
+
+#префиксы системных имен ресурсов по типам
+RESOURCE_PREFIXES = "MFTIE"
+
+class SyntheticRelation:
+    def __init__(self, source_id: int, target_id: int):
+        self.source_id = source_id
+        self.target_id = target_id
+
+class SyntheticModel:
+    """Сгенерированная модель: узлы, связи между ними и ресурсы ПО"""
+
+    def __init__(self, nodes: [SimulationNodedata], relations: [SyntheticRelation],
+                 resources: [SimulationResource]):
+        self.nodes = nodes
+        self.relations = relations
+        self.resources = resources
+
+def generate_formula(rnd: random.Random, sys_names: [str], resource_operand_share: float,
+                     error_share: float) -> str:
+    """Возвращает формулу ресурса узла: операция над ресурсом с константой или другим ресурсом"""
+    target = rnd.choice(sys_names)
+    source = rnd.choice(sys_names)
+    operation = rnd.choice("+-*/")
+    if rnd.random() < error_share:
+        # ссылка на несуществующий ресурс
+        target = "XRes0"
+    if rnd.random() < resource_operand_share:
+        operand = rnd.choice(sys_names)
+    elif operation in "*/":
+        operand = str(rnd.choice([0.5, 1, 1.5, 2, 3]))
+    else:
+        operand = str(rnd.randint(1, 9))
+    return f"{target}:={source}{operation}{operand}"
+
+def generate_model(nodes: int = 100, resources: int = 10, formulas_per_node: int = 2,
+                   resource_operand_share: float = 0.3, error_share: float = 0.0, extra_relation_share: float = 0.0,
+                   max_duration: int = 7, seed: int = 0) -> SyntheticModel:
+    """Генерирует модель заданного размера.
+
+    Узлы связаны в цепочку; extra_relation_share - доля узлов с дополнительной связью вперед по цепочке.
+    В каждом узле до formulas_per_node формул на входе и на выходе; resource_operand_share - доля формул,
+    в которых операнд - другой ресурс, error_share - доля формул с ошибкой"""
+    rnd = random.Random(seed)
+    sim_resources = [SimulationResource(id=index + 1, name=f"Ресурс {index + 1}",
+                                        sys_name=f"{RESOURCE_PREFIXES[index % len(RESOURCE_PREFIXES)]}Res{index + 1}",
+                                        current_value=float(rnd.randint(1, 50)), min_value=1.0,
+                                        max_value=float(rnd.choice([100, 1000, 10000])))
+                     for index in range(resources)]
+    sys_names = [res.sys_name for res in sim_resources]
+
+    node_res_id = 0
+    sim_nodes = []
+    for index in range(nodes):
+        node_resources = []
+        for _ in range(2):
+            formulas = []
+            for _ in range(rnd.randint(0, formulas_per_node)):
+                node_res_id += 1
+                formulas.append(SimulationNodeRes(id=node_res_id, value=generate_formula(
+                    rnd, sys_names, resource_operand_share, error_share)))
+            node_resources.append(formulas)
+        duration = rnd.randint(1, max_duration)
+        sim_nodes.append(SimulationNodedata(id=index + 1, name=f"Узел {index + 1}", cost=float(rnd.randint(0, 10)),
+                                            duration=duration, duration_spec=str(duration),
+                                            resources_in=node_resources[0], resources_out=node_resources[1]))
+
+    relations = [SyntheticRelation(index, index + 1) for index in range(1, nodes)]
+    for index in range(1, nodes - 1):
+        if rnd.random() < extra_relation_share:
+            relations.append(SyntheticRelation(index, rnd.randint(index + 1, nodes)))
+    return SyntheticModel(sim_nodes, relations, sim_resources)
+
+def seed_database(session, model: SyntheticModel, sub_area_id: int = 1, model_id: int = 1):
+    """Записывает сгенерированную модель в БД как предметную область с одной моделью"""
+    session.add(SubjectArea(id=sub_area_id, name=f"Замеры {sub_area_id}"))
+    session.add(Model(id=model_id, name=f"Модель {model_id}", sub_area_id=sub_area_id))
+    type_ids = {}
+    for index, prefix in enumerate(RESOURCE_PREFIXES):
+        type_ids[prefix] = index + 1
+        session.merge(ResourceType(id=index + 1, name=prefix, prefix=prefix))
+    session.flush()
+    session.bulk_save_objects([Resource(id=res.id, sub_area_id=sub_area_id, type_id=type_ids[res.sys_name[0]],
+                                        name=res.name, sys_name=res.sys_name, current_value=res.current_value,
+                                        min_value=res.min_value, max_value=res.max_value)
+                               for res in model.resources])
+    session.bulk_save_objects([Node(id=node.id, name=node.name, model_id=model_id, posX=0, posY=0)
+                               for node in model.nodes])
+    session.bulk_save_objects([NodeDetail(node_id=node.id, duration=node.duration_spec, cost=node.cost)
+                               for node in model.nodes])
+    session.bulk_save_objects([NodeRes(id=res.id, node_id=node.id, model_id=model_id, res_in_out=res_in_out,
+                                       res_id=model.resources[0].id, value=res.value)
+                               for node in model.nodes
+                               for res_in_out, node_resources in enumerate((node.db_resources_in,
+                                                                            node.db_resources_out))
+                               for res in node_resources])
+    session.bulk_save_objects([Relation(source_id=relation.source_id, target_id=relation.target_id,
+                                        model_id=model_id)
+                               for relation in model.relations])
+    session.commit()
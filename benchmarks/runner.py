@@ -0,0 +1,77 @@
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+
+class BenchmarkResult:
+    """Результат замера: время выполнения по повторам и пик выделенной памяти"""
+
+    def __init__(self, name: str, times: [float], peak_memory: int):
+        self.name = name
+        self.times = times
+        self.peak_memory = peak_memory
+
+    @property
+    def min(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "min": self.min, "median": self.median,
+                "mean": statistics.fmean(self.times), "rounds": len(self.times), "peak_memory": self.peak_memory}
+
+def measure(name: str, function, rounds: int = 5, warmup: int = 1) -> BenchmarkResult:
+    """Замеряет время выполнения функции за несколько повторов, затем пик памяти за один отдельный вызов.
+    Память замеряется отдельно, потому что tracemalloc заметно замедляет выполнение"""
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(rounds):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(name, times, peak_memory)
+
+def format_header() -> str:
+    """Возвращает заголовок таблицы результатов замеров"""
+    return f"{'Замер':<40}{'мин, мс':>12}{'медиана, мс':>14}{'память, КБ':>14}"
+
+def format_result(result: BenchmarkResult) -> str:
+    """Возвращает строку таблицы результатов замеров"""
+    return (f"{result.name:<40}{result.min * 1000:>12.2f}{result.median * 1000:>14.2f}"
+            f"{result.peak_memory / 1024:>14.1f}")
+
+def save_results(results: [BenchmarkResult], path: str):
+    """Сохраняет результаты замеров в json для сравнения с последующими"""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump([result.to_dict() for result in results], file, ensure_ascii=False, indent=2)
+
+def compare_results(results: [BenchmarkResult], path: str, threshold: float = 0.1) -> [str]:
+    """Сравнивает результаты с сохраненными ранее и возвращает описания ухудшений больше threshold"""
+    with open(path, encoding="utf-8") as file:
+        baseline = {item["name"]: item for item in json.load(file)}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        if result.median > previous["median"] * (1 + threshold):
+            regressions.append(f"{result.name}: время {previous['median'] * 1000:.2f} -> "
+                               f"{result.median * 1000:.2f} мс")
+        if result.peak_memory > previous["peak_memory"] * (1 + threshold):
+            regressions.append(f"{result.name}: память {previous['peak_memory'] / 1024:.1f} -> "
+                               f"{result.peak_memory / 1024:.1f} КБ")
+    return regressions
@@ -3,10 +3,17 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from db.config import settings
 
+def get_connect_args(url: str) -> dict:
+    """Возвращает параметры подключения для СУБД из адреса БД"""
+    if url.startswith('sqlite'):
+        # SQLite используется для замеров производительности; соединение нужно из разных потоков
+        return {'check_same_thread': False}
+    return {'sslmode': 'disable'}
+
 # Создание движка базы данных
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={'sslmode':'disable'}
+    connect_args=get_connect_args(settings.DATABASE_URL)
 )
 
 # Создание сессии
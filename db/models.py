@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, String, Integer, ForeignKey
+from sqlalchemy import Column, Float, String, Integer, ForeignKey, DateTime, JSON, Index, func
 from sqlalchemy.orm import relationship
 from db.database import Base
 
@@ -11,6 +11,7 @@ class User(Base):
 
 class SubjectArea(Base):
     __tablename__ = "subject_areas"
+    __table_args__ = (Index('ix_subject_areas_name', 'name', unique=True),)
 
     id = Column(Integer, primary_key=True, unique=True)
     name = Column(String)
@@ -21,6 +22,7 @@ class SubjectArea(Base):
 
 class Model(Base):
     __tablename__ = "models"
+    __table_args__ = (Index('ix_models_sub_area_id_name', 'sub_area_id', 'name', unique=True),)
 
     id = Column(Integer, primary_key=True, unique=True)
     name = Column(String)
@@ -33,6 +35,8 @@ class Model(Base):
 
 class Node(Base):
     __tablename__ = "nodes"
+    # имя узла не уникально: новые узлы создаются с одинаковым именем по умолчанию
+    __table_args__ = (Index('ix_nodes_model_id_name', 'model_id', 'name'),)
 
     id = Column(Integer, primary_key=True, unique=True)
     name = Column(String)
@@ -57,6 +61,9 @@ class Node(Base):
 
 class Relation(Base):
     __tablename__ = "relations"
+    __table_args__ = (Index('ix_relations_model_id', 'model_id'),
+                      Index('ix_relations_source_id', 'source_id'),
+                      Index('ix_relations_target_id', 'target_id'))
 
     id = Column(Integer, primary_key=True, unique=True)
     source_id = Column(Integer, ForeignKey('nodes.id'))
@@ -76,6 +83,7 @@ class Relation(Base):
 
 class NodeDetail(Base):
     __tablename__ = "node_details"
+    __table_args__ = (Index('ix_node_details_node_id', 'node_id'),)
 
     id = Column(Integer, primary_key=True, unique=True)
     node_id = Column(Integer, ForeignKey('nodes.id'))
@@ -84,6 +92,8 @@ class NodeDetail(Base):
 
 class NodeRes(Base):
     __tablename__ = "node_resources"
+    __table_args__ = (Index('ix_node_resources_node_id_res_in_out', 'node_id', 'res_in_out'),
+                      Index('ix_node_resources_model_id', 'model_id'))
 
     id = Column(Integer, primary_key=True, unique=True)
     node_id = Column(Integer, ForeignKey('nodes.id'))
@@ -94,6 +104,9 @@ class NodeRes(Base):
 
 class Resource(Base):
     __tablename__ = "resources"
+    # системное имя не уникально: после удаления ресурса номер в имени может повториться
+    __table_args__ = (Index('ix_resources_sub_area_id_name', 'sub_area_id', 'name', unique=True),
+                      Index('ix_resources_sub_area_id_sys_name', 'sub_area_id', 'sys_name'))
 
     id = Column(Integer, primary_key=True, unique=True)
     sub_area_id = Column(Integer, ForeignKey('subject_areas.id'))
@@ -124,6 +137,7 @@ class Measure(Base):
 
 class Chart(Base):
     __tablename__ = "charts"
+    __table_args__ = (Index('ix_charts_model_id', 'model_id'),)
 
     id = Column(Integer, primary_key=True, unique=True)
     model_id = Column(Integer, ForeignKey('models.id'))
@@ -135,6 +149,7 @@ class Chart(Base):
 
 class ModelControl(Base):
     __tablename__ = "model_controls"
+    __table_args__ = (Index('ix_model_controls_model_id', 'model_id'),)
 
     id = Column(Integer, primary_key=True, unique=True)
     model_id = Column(Integer, ForeignKey('models.id'))
@@ -144,3 +159,36 @@ class ModelControl(Base):
     pos_y = Column(Float)
     width = Column(Float, nullable=True)
     height = Column(Float, nullable=True)
+
+class DataVersion(Base):
+    """Версия данных моделей и ресурсов (одна строка). Увеличивается при каждом их изменении;
+    по ней процессы сервера узнают, что подготовленные планы моделей устарели"""
+    __tablename__ = "data_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class SimulationRun(Base):
+    __tablename__ = "simulation_runs"
+
+    id = Column(Integer, primary_key=True, unique=True)
+    model_id = Column(Integer, ForeignKey('models.id', ondelete='CASCADE'))
+    sub_area_id = Column(Integer, ForeignKey('subject_areas.id', ondelete='CASCADE'))
+    created_at = Column(DateTime, server_default=func.now())
+    time_limit = Column(Float)
+    engine = Column(String)
+    cost = Column(Float)
+    sample_count = Column(Integer)
+    checkpoint = Column(JSON, nullable=True)
+
+    __table_args__ = (Index('ix_simulation_runs_model_id_id', 'model_id', 'id'),)
+
+class SimulationSample(Base):
+    __tablename__ = "simulation_samples"
+
+    # номер изменения в запуске - ключ для постраничной выдачи
+    run_id = Column(Integer, ForeignKey('simulation_runs.id', ondelete='CASCADE'), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    time = Column(Float)
+    res_id = Column(Integer)
+    value = Column(Float, nullable=True)
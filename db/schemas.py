@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, Dict, List, Union
 
 class User(BaseModel):
     username: str
@@ -108,4 +108,48 @@ class ModelControl(BaseModel):
     height: Optional[float] = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class ResourceOverride(BaseModel):
+    current_value: Optional[float] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+class NodeOverride(BaseModel):
+    duration: Optional[float] = None
+    cost: Optional[float] = None
+
+class SweepScenario(BaseModel):
+    resources: Dict[str, ResourceOverride] = {}
+    nodes: Dict[int, NodeOverride] = {}
+
+class Sweep(BaseModel):
+    scenarios: List[SweepScenario]
+    time_limit: int = 500
+    include_series: bool = False
+
+class StochasticNode(BaseModel):
+    duration: Optional[str] = None
+    cost: Optional[str] = None
+
+class MonteCarlo(BaseModel):
+    replications: int = 1000
+    seed: Optional[int] = None
+    time_limit: int = 500
+    points: int = 100
+    batch_size: int = 250
+    percentiles: List[float] = [5, 50, 95]
+    confidence_level: float = 0.95
+    nodes: Dict[int, StochasticNode] = {}
+
+class Checkpoint(BaseModel):
+    time: Union[int, float]
+    time_limit: Union[int, float]
+    event_index: int
+    event_id: int
+    cost: Union[int, float]
+    values: Dict[str, Optional[float]]
+
+class ContinueSimulation(BaseModel):
+    checkpoint: Checkpoint
+    time_limit: int
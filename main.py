@@ -1,11 +1,13 @@
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse
-from sqlalchemy import and_, or_
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import and_, or_, create_engine
 
-from db.database import engine
+from db.database import engine, get_connect_args
 from db.models import User as ModelUser
 from db.models import Node as ModelNode
 from db.models import SubjectArea as ModelSubjectArea
@@ -18,6 +20,8 @@ from db.models import NodeRes as ModelNodeRes
 from db.models import Measure as ModelMeasure
 from db.models import Chart as ModelChart
 from db.models import ModelControl as ModelBpsimModelControl
+from db.models import SimulationRun as ModelSimulationRun
+from db.models import SimulationSample as ModelSimulationSample
 
 from db.schemas import User as SchemaUser
 from db.schemas import Node as SchemaNode
@@ -29,25 +33,57 @@ from db.schemas import Resource as SchemaResource
 from db.schemas import NodeRes as SchemaNodeRes
 from db.schemas import Chart as SchemaChart
 from db.schemas import ModelControl as SchemaModelControl
+from db.schemas import Sweep as SchemaSweep
+from db.schemas import MonteCarlo as SchemaMonteCarlo
+from db.schemas import ContinueSimulation as SchemaContinueSimulation
 from db.database import Base
 
 from fastapi_sqlalchemy import DBSessionMiddleware, db
 
 from shared.enums.control_types import ControlType
+from shared.enums.report_levels import ReportLevel
+from shared.enums.simulation_engines import SimulationEngine
+from shared.enums.export_formats import ExportFormat
+from shared.enums.export_layouts import ExportLayout
+from shared.enums.downsampling_methods import DownsamplingMethod
+from shared.timing import PhaseTimer
+from shared.metrics import metrics, MetricsMiddleware, watch_db_pool, simulation_cache_requests
 from shared.validation import (check_existance, check_sub_area_name_unique, check_model_name_unique,
-                               check_resource_name_unique, check_node_name_unique)
-
-from simulation.sim import get_events_list, get_report
-from simulation.types import SimulationNodedata
+                               check_resource_name_unique, check_node_name_unique, check_distribution,
+                               check_monte_carlo_settings, check_monte_carlo_size, check_sweep_size, check_time_limit,
+                               check_checkpoint, check_model_durations, check_page_limit, check_chart_width)
+
+from simulation.sim import get_events_list, create_simulation_run, ModelPlan
+from simulation.topological_sort import CycleError
+from simulation.cache import simulation_cache, get_model_key, get_result_key
+from simulation.storage import save_simulation_run, get_samples_page, DatabaseGeneration
+from simulation.export import iter_csv, write_xlsx, iter_file, xlsxwriter
+from simulation.downsampling import downsample
+from simulation.loader import load_model
+from simulation.results import SimulationResults
+from simulation.executor import run_simulation, run_sweep, run_monte_carlo, shutdown_process_pool
 
 import os
+import json
+import logging
 from dotenv import load_dotenv
 
 load_dotenv('.env')
 
+# структурированные записи о времени этапов обработки запросов симуляции (уровень INFO);
+# обработчики и уровень задаются конфигурацией логирования сервера, например uvicorn --log-config
+timing_logger = logging.getLogger("bpsim")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # останавливаем пул процессов симуляции при завершении приложения
+    shutdown_process_pool()
+
 app = FastAPI(
     title="API для работы с BPsim.MAS",
     version="1.0.0",
+    lifespan=lifespan,
     openapi_tags=[
         {
             "name": "Simulation",
@@ -111,7 +147,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-app.add_middleware(DBSessionMiddleware, db_url=os.environ['DATABASE_URL'])
+# движок сессий запросов создается здесь, чтобы следить за его пулом соединений
+session_engine = create_engine(os.environ['DATABASE_URL'],
+                               connect_args=get_connect_args(os.environ['DATABASE_URL']))
+watch_db_pool(session_engine)
+app.add_middleware(DBSessionMiddleware, custom_engine=session_engine)
+# версия данных для кэша планов хранится в БД, чтобы изменения были видны всем процессам сервера
+simulation_cache.generation_store = DatabaseGeneration(lambda: db.session)
+app.add_middleware(MetricsMiddleware)
 
 # Создание таблиц в базе данных
 Base.metadata.create_all(bind=engine)
@@ -172,6 +215,7 @@ async def delete_subject_area(id: int):
 
     db.session.delete(db_sub_area)
     db.session.commit()
+    simulation_cache.invalidate()
 
     return {"status": "success", "message": f"Предметная область '{name}' успешно удалена"}
 
@@ -208,6 +252,7 @@ async def delete_model(id: int):
 
     db.session.delete(db_model)
     db.session.commit()
+    simulation_cache.invalidate()
 
     return {"status": "success", "message": f"Модель '{name}' успешно удалена"}
 
@@ -247,6 +292,7 @@ async def create_node(node: SchemaNode):
     db_node_details = ModelNodeDetail(node_id=db_node.id, cost=0.0, duration="0")
     db.session.add(db_node_details)
     db.session.commit()
+    simulation_cache.invalidate()
 
     return db_node
 
@@ -267,6 +313,7 @@ async def update_node(id: int, node_update: SchemaNode):
 
     db.session.add(db_node)
     db.session.commit()
+    simulation_cache.invalidate()
     new_node = db.session.query(ModelNode).get(id)
 
     return {"status": "success", "data": new_node}
@@ -288,6 +335,7 @@ async def delete_node(id: int):
     if relation:
         db.session.delete(relation)
         db.session.commit()
+    simulation_cache.invalidate()
 
     return {"status": "success", "message": f"Узел '{name}' успешно удалён"}
 
@@ -311,6 +359,7 @@ async def create_relation(relation : SchemaRelation):
     db_relation = ModelRelation(source_id=relation.source_id, target_id=relation.target_id, model_id=relation.model_id)
     db.session.add(db_relation)
     db.session.commit()
+    simulation_cache.invalidate()
     db.session.refresh(db_relation)
     return db_relation
 
@@ -325,6 +374,7 @@ async def update_relation(id: int, relation_update: SchemaRelation):
 
     db.session.add(db_relation)
     db.session.commit()
+    simulation_cache.invalidate()
     new_relation = db.session.query(ModelRelation).get(id)
 
     return {"status": "success", "data": new_relation}
@@ -336,6 +386,7 @@ async def delete_relation(id: int):
     check_existance(db_relation, "Связь не найдена")
     db.session.delete(db_relation)
     db.session.commit()
+    simulation_cache.invalidate()
 
     return {"status": "success", "message": "Связь успешно удалена"}
 
@@ -349,9 +400,11 @@ async def get_node_details(node_id: int):
 @app.post("/nodeDetails/", tags=["Node Details"])
 async def create_node_details(details: SchemaNodeDetail):
     """Добавляет свойства узла"""
+    check_distribution(details.duration)
     new_details = ModelNodeDetail(node_id=details.node_id, duration=details.duration, cost = details.cost)
     db.session.add(new_details)
     db.session.commit()
+    simulation_cache.invalidate()
     db.session.refresh(new_details)
     return new_details
 
@@ -359,36 +412,253 @@ async def create_node_details(details: SchemaNodeDetail):
 async def update_node_details(id: int, details_update: SchemaNodeDetail):
     db_node_details = db.session.query(ModelNodeDetail).get(id)
     check_existance(db_node_details, "Свойства узла не найдены")
+    check_distribution(details_update.duration)
 
     for key, value in details_update.dict(exclude_none=True).items():
         setattr(db_node_details, key, value)
 
     db.session.add(db_node_details)
     db.session.commit()
+    simulation_cache.invalidate()
     new_details = db.session.query(ModelNodeDetail).get(id)
 
     return {"status": "success", "data": new_details}
 
+def load_simulation_data(sub_area_id: int, model_id: int, timer: PhaseTimer = None):
+    """Загружает из БД события модели и ресурсы ПО для проведения симуляции"""
+    timer = timer or PhaseTimer()
+    with timer.phase("db"):
+        try:
+            node_data, relations, sub_area_resources = load_model(db.session, sub_area_id, model_id)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+    with timer.phase("sort"):
+        try:
+            events = get_events_list(node_data, relations)
+        except CycleError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+    return events, sub_area_resources
+
+def load_model_plan(sub_area_id: int, model_id: int, timer: PhaseTimer = None) -> ModelPlan:
+    """Загружает модель из БД и готовит ее к симуляции. Если модель не изменилась
+    с прошлой загрузки, возвращается уже подготовленный план"""
+    timer = timer or PhaseTimer()
+    events, sub_area_resources = load_simulation_data(sub_area_id, model_id, timer)
+    with timer.phase("compile"):
+        # хэш модели вычисляется сразу, вне цикла событий
+        key = get_model_key(events, sub_area_resources)
+        plan = simulation_cache.get_loaded_plan(sub_area_id, model_id, key)
+        if plan is None:
+            plan = ModelPlan(events, sub_area_resources, key)
+    return plan
+
+async def get_model_plan(sub_area_id: int, model_id: int, timer: PhaseTimer = None) -> ModelPlan:
+    """Возвращает план модели из кэша, если модель не менялась, иначе загружает модель из БД"""
+    generation = simulation_cache.get_generation()
+    plan = simulation_cache.get_plan(sub_area_id, model_id, generation)
+    simulation_cache_requests.inc("plan", "miss" if plan is None else "hit")
+    if plan is None:
+        # загрузка из БД и подготовка плана выполняются вне цикла событий
+        plan = await run_in_threadpool(load_model_plan, sub_area_id, model_id, timer)
+        simulation_cache.set_plan(sub_area_id, model_id, plan, generation)
+    return plan
+
+def get_export_table(results: SimulationResults, export_layout: ExportLayout):
+    """Возвращает таблицу экспорта в выбранном виде"""
+    if export_layout == ExportLayout.SPARSE:
+        return results.get_export_changes()
+    return results.get_export_table()
+
+def get_timed_response(body: bytes, timer: PhaseTimer, cache: str = None, **fields) -> Response:
+    """Возвращает ответ с заголовком Server-Timing и пишет время этапов запроса в журнал"""
+    headers = {"Server-Timing": timer.get_server_timing()}
+    if cache is not None:
+        headers["X-Cache"] = fields["cache"] = cache
+        simulation_cache_requests.inc("result", cache.lower())
+    timer.log("simulation", response_bytes=len(body), **fields)
+    return Response(body, media_type="application/json", headers=headers)
+
 @app.get("/start/{sub_area_id}/{model_id}/", tags=["Simulation"])
-async def start_simulation(sub_area_id: int, model_id: int):
-    nodes = db.session.query(ModelNode).filter(ModelNode.model_id == model_id).all()
-    relations = (db.session.query(ModelRelation).filter(ModelRelation.model_id == model_id).all())
-    node_data = []
-    for node in nodes:
-        details = (db.session.query(ModelNodeDetail).filter(ModelNodeDetail.node_id == node.id).first())
-        resources_in = db.session.query(ModelNodeRes).filter(and_(ModelNodeRes.node_id == node.id,
-                                                                  ModelNodeRes.res_in_out == 0)).all()
-        resources_out = db.session.query(ModelNodeRes).filter(and_(ModelNodeRes.node_id == node.id,
-                                                                  ModelNodeRes.res_in_out == 1)).all()
-        node_data.append(SimulationNodedata(
-            id=node.id, name=node.name,
-            duration=int(details.duration), cost = details.cost,
-            resources_in=resources_in, resources_out=resources_out))
-
-    sub_area_resources = db.session.query(ModelResource).filter(ModelResource.sub_area_id == sub_area_id).all()
-    events = get_events_list(node_data, relations)
-    (report, chart_table, export_table) = get_report(events, 500, sub_area_resources)
-    return {"report": report, "chart_table": chart_table, "export_table": export_table}
+async def start_simulation(sub_area_id: int, model_id: int, report_level: ReportLevel = ReportLevel.FULL,
+                           engine: SimulationEngine = SimulationEngine.SIMPY, time_limit: int = 500,
+                           save: bool = False, export_layout: ExportLayout = ExportLayout.DENSE):
+    """Запускает симуляцию
+
+    report_level - подробность отчета: 0 - без отчета, 1 - только итоги и ошибки, 2 - полный отчет
+    engine - движок симуляции: simpy, fast (быстрый последовательный проход по событиям без simpy)
+    или compiled (как fast, но полный цикл событий выполняется сгенерированной для модели функцией)
+    time_limit - время симуляции. В ответе возвращается checkpoint для продолжения симуляции
+    save - сохранить запуск и изменения ресурсов в БД. В ответе возвращается run_id
+    export_layout - вид таблицы экспорта: dense - строка значений всех ресурсов после каждого изменения,
+    sparse - журнал изменений [время, номер столбца, значение] только по ресурсам, которые используются в формулах"""
+    check_time_limit(time_limit)
+    timer = PhaseTimer()
+    fields = {"endpoint": "start", "sub_area_id": sub_area_id, "model_id": model_id, "engine": engine.value,
+              "report_level": int(report_level), "time_limit": time_limit}
+    params = (time_limit, int(report_level), engine.value, export_layout.value)
+    plan = await get_model_plan(sub_area_id, model_id, timer)
+    check_model_durations(plan.events)
+    with timer.phase("cache"):
+        result_key = get_result_key(plan.key, *params)
+        body = None if save else simulation_cache.get(result_key)
+    if body is not None:
+        return get_timed_response(body, timer, "HIT", events=len(plan.events), **fields)
+
+    # симуляция выполняется вне цикла событий
+    with timer.phase("simulate"):
+        (event_log, results, checkpoint) = await run_simulation(plan.events, time_limit, plan.resources,
+                                                                report_level, engine, plan=plan)
+    with timer.phase("render"):
+        content = {"report": event_log.render(), "chart_table": results.get_chart_table(),
+                   "export_table": get_export_table(results, export_layout), "checkpoint": checkpoint}
+    with timer.phase("encode"):
+        body = JSONResponse(content).body
+    with timer.phase("cache"):
+        simulation_cache.put(result_key, body)
+    if save:
+        cost = checkpoint['cost'] if checkpoint else 0
+        with timer.phase("save"):
+            db_run = await run_in_threadpool(save_simulation_run, db.session, sub_area_id, model_id, time_limit,
+                                             engine.value, cost, results, checkpoint)
+        with timer.phase("encode"):
+            body = JSONResponse({**content, "run_id": db_run.id}).body
+    return get_timed_response(body, timer, "MISS", events=len(plan.events), resource_changes=len(results),
+                              log_records=len(event_log), results_bytes=results.nbytes, **fields)
+
+@app.post("/continue/{sub_area_id}/{model_id}/", tags=["Simulation"])
+async def continue_simulation(sub_area_id: int, model_id: int, settings: SchemaContinueSimulation,
+                              report_level: ReportLevel = ReportLevel.FULL,
+                              engine: SimulationEngine = SimulationEngine.SIMPY,
+                              export_layout: ExportLayout = ExportLayout.DENSE):
+    """Продолжает симуляцию с контрольной точки до нового времени time_limit.
+
+    Возвращаются только результаты после контрольной точки и новая контрольная точка"""
+    timer = PhaseTimer()
+    plan = await get_model_plan(sub_area_id, model_id, timer)
+    check_checkpoint(settings.checkpoint, plan.events, settings.time_limit)
+    check_model_durations(plan.events)
+    with timer.phase("simulate"):
+        (event_log, results, checkpoint) = await run_simulation(plan.events, settings.time_limit, plan.resources,
+                                                                report_level, engine, settings.checkpoint.dict(),
+                                                                plan)
+    with timer.phase("render"):
+        content = {"report": event_log.render(), "chart_table": results.get_chart_table(),
+                   "export_table": get_export_table(results, export_layout), "checkpoint": checkpoint}
+    with timer.phase("encode"):
+        body = JSONResponse(content).body
+    return get_timed_response(body, timer, endpoint="continue", sub_area_id=sub_area_id, model_id=model_id,
+                              engine=engine.value, report_level=int(report_level), time_limit=settings.time_limit,
+                              events=len(plan.events), resource_changes=len(results), log_records=len(event_log),
+                              results_bytes=results.nbytes)
+
+@app.get("/start/{sub_area_id}/{model_id}/stream/", tags=["Simulation"])
+async def stream_simulation(sub_area_id: int, model_id: int, chunk_size: int = 1000,
+                            report_level: ReportLevel = ReportLevel.FULL,
+                            engine: SimulationEngine = SimulationEngine.SIMPY, time_limit: int = 500):
+    """Запускает симуляцию и отдает результаты частями в формате NDJSON по мере их получения.
+    Каждая строка содержит части report, chart_table и export_table, последняя - также checkpoint"""
+    check_time_limit(time_limit)
+    plan = await get_model_plan(sub_area_id, model_id)
+    # ошибки модели проверяются до начала ответа, а не посреди потока
+    check_model_durations(plan.events)
+    simulation_run = create_simulation_run(plan.events, time_limit, plan.resources, report_level, engine, plan=plan)
+
+    def generate_lines():
+        for chunk in simulation_run.stream(chunk_size):
+            yield json.dumps(chunk, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+@app.get("/export/{sub_area_id}/{model_id}/", tags=["Simulation"])
+async def export_simulation(sub_area_id: int, model_id: int, format: ExportFormat = ExportFormat.CSV,
+                            engine: SimulationEngine = SimulationEngine.SIMPY, time_limit: int = 500,
+                            used_only: bool = False):
+    """Запускает симуляцию и отдает таблицу экспорта файлом csv или xlsx.
+    Файл формируется и передается по частям, без построения всей таблицы в памяти.
+    used_only - только столбцы ресурсов, которые используются в формулах модели"""
+    check_time_limit(time_limit)
+    if format == ExportFormat.XLSX and xlsxwriter is None:
+        raise HTTPException(status_code=501, detail='Экспорт в xlsx недоступен: не установлен пакет xlsxwriter')
+    plan = await get_model_plan(sub_area_id, model_id)
+    check_model_durations(plan.events)
+    (_, results, _) = await run_simulation(plan.events, time_limit, plan.resources, ReportLevel.NONE, engine,
+                                           plan=plan)
+
+    filename = f"simulation_{model_id}.{format.value}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == ExportFormat.XLSX:
+        file = await run_in_threadpool(write_xlsx, results, used_only)
+        return StreamingResponse(iter_file(file), headers=headers,
+                                 media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    return StreamingResponse(iter_csv(results, used_only), headers=headers, media_type="text/csv; charset=utf-8")
+
+@app.post("/sweep/{sub_area_id}/{model_id}/", tags=["Simulation"])
+async def sweep_simulation(sub_area_id: int, model_id: int, sweep: SchemaSweep):
+    """Моделирует серию сценариев одной модели за один запрос.
+
+    Сценарий может переопределять текущее, минимальное и максимальное значения ресурсов (по системному имени)
+    и длительность и затраты узлов (по id узла). Модель загружается из БД один раз"""
+    check_time_limit(sweep.time_limit)
+    plan = await get_model_plan(sub_area_id, model_id)
+    check_sweep_size(sweep, len(plan.state), len(plan.events))
+    try:
+        return await run_sweep(plan.events, sweep.time_limit, plan.resources, sweep.scenarios, sweep.include_series)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+@app.post("/monteCarlo/{sub_area_id}/{model_id}/", tags=["Simulation"])
+async def monte_carlo_simulation(sub_area_id: int, model_id: int, settings: SchemaMonteCarlo):
+    """Проводит повторы симуляции со случайными длительностями и затратами узлов.
+
+    Длительность берется из свойств узла или из nodes, затраты - из nodes. Допустимы число,
+    uniform(мин, макс), normal(среднее, отклонение), triangular(мин, мода, макс), exponential(среднее).
+    Возвращает среднее, отклонение, процентили и доверительный интервал затрат и значений ресурсов"""
+    check_monte_carlo_settings(settings)
+    check_time_limit(settings.time_limit)
+    plan = await get_model_plan(sub_area_id, model_id)
+    check_monte_carlo_size(settings, len(plan.state))
+    try:
+        return await run_monte_carlo(plan.events, settings.time_limit, plan.resources, settings.replications,
+                                     settings.seed, settings.nodes, settings.points, settings.batch_size,
+                                     settings.percentiles, settings.confidence_level)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+@app.get("/runs/{model_id}/", tags=["Simulation Runs"])
+async def get_simulation_runs(model_id: int, before: int = None, limit: int = 50):
+    """Возвращает сохраненные запуски модели, начиная с последних.
+    Следующая страница запрашивается с before, равным next из ответа"""
+    check_page_limit(limit)
+    query = db.session.query(ModelSimulationRun).filter(ModelSimulationRun.model_id == model_id)
+    if before is not None:
+        query = query.filter(ModelSimulationRun.id < before)
+    runs = query.order_by(ModelSimulationRun.id.desc()).limit(limit).all()
+    return {"data": runs, "next": runs[-1].id if len(runs) == limit else None}
+
+@app.get("/run/{id}/", tags=["Simulation Runs"])
+async def get_simulation_run(id: int):
+    """Возвращает сохраненный запуск по id"""
+    db_run = db.session.query(ModelSimulationRun).get(id)
+    check_existance(db_run, "Запуск не найден")
+    return db_run
+
+@app.get("/run/{id}/samples/", tags=["Simulation Runs"])
+async def get_simulation_samples(id: int, after: int = -1, limit: int = 1000):
+    """Возвращает изменения ресурсов сохраненного запуска по порядку.
+    Следующая страница запрашивается с after, равным next из ответа"""
+    check_page_limit(limit)
+    check_existance(db.session.query(ModelSimulationRun).get(id), "Запуск не найден")
+    return await run_in_threadpool(get_samples_page, db.session, id, after, limit)
+
+@app.delete("/run/{id}/", tags=["Simulation Runs"])
+async def delete_simulation_run(id: int):
+    """Удаляет сохраненный запуск вместе с изменениями ресурсов"""
+    db_run = db.session.query(ModelSimulationRun).get(id)
+    check_existance(db_run, "Запуск не найден")
+    db.session.query(ModelSimulationSample).filter(ModelSimulationSample.run_id == id).delete()
+    db.session.delete(db_run)
+    db.session.commit()
+    return {"status": "success", "message": "Запуск успешно удален"}
 
 @app.get("/resources/{sub_area_id}/", tags=["Resources"])
 async def get_resources(sub_area_id: int):
@@ -410,6 +680,7 @@ async def create_resource(resource: SchemaResource):
                                  current_value=resource.current_value, sys_name=sys_name)
     db.session.add(new_resource)
     db.session.commit()
+    simulation_cache.invalidate()
     db.session.refresh(new_resource)
     return new_resource
 
@@ -419,6 +690,7 @@ async def delete_resource(id: int):
     check_existance(res, "Такой ресурс не найден")
     db.session.delete(res)
     db.session.commit()
+    simulation_cache.invalidate()
     return {"status": "success", "message": "Ресурс успешно удален"}
 
 @app.get("/measures/", tags=["Measures"])
@@ -440,6 +712,7 @@ async def create_node_resource(res: SchemaNodeRes):
                                 res_id=res.res_id, model_id=res.model_id)
     db.session.add(new_node_res)
     db.session.commit()
+    simulation_cache.invalidate()
     db.session.refresh(new_node_res)
     return new_node_res
 
@@ -464,6 +737,40 @@ async def get_charts(model_id: int):
     charts = db.session.query(ModelChart).filter(ModelChart.model_id == model_id).all()
     return charts
 
+@app.get('/chart/{chart_id}/data/', tags=["Charts"])
+async def get_chart_data(chart_id: int, width: int = 800, method: DownsamplingMethod = DownsamplingMethod.LTTB,
+                         run_id: int = None, engine: SimulationEngine = SimulationEngine.SIMPY,
+                         time_limit: int = 500):
+    """Возвращает изменения ресурса диаграммы, прореженные до width точек методом
+    lttb (Largest-Triangle-Three-Buckets) или minmax (минимум и максимум на участке).
+    Если задан run_id, данные берутся из сохраненного запуска, иначе проводится симуляция"""
+    chart = db.session.query(ModelChart).get(chart_id)
+    check_existance(chart, 'Диаграмма с таким id не найдена')
+    check_chart_width(width)
+    if run_id is not None:
+        db_run = db.session.query(ModelSimulationRun).get(run_id)
+        check_existance(db_run, "Запуск не найден")
+        if db_run.model_id != chart.model_id:
+            raise HTTPException(status_code=400, detail="Запуск относится к другой модели, чем диаграмма")
+        samples = (db.session.query(ModelSimulationSample.time, ModelSimulationSample.value)
+                   .filter(and_(ModelSimulationSample.run_id == run_id,
+                                ModelSimulationSample.res_id == chart.object_id))
+                   .order_by(ModelSimulationSample.seq).all())
+        times, values = [sample.time for sample in samples], [sample.value for sample in samples]
+    else:
+        check_time_limit(time_limit)
+        model = db.session.query(ModelBpsimModel).get(chart.model_id)
+        check_existance(model, "Модель не найдена")
+        plan = await get_model_plan(model.sub_area_id, model.id)
+        check_model_durations(plan.events)
+        (_, results, _) = await run_simulation(plan.events, time_limit, plan.resources, ReportLevel.NONE, engine,
+                                               plan=plan)
+        times, values = results.get_series(chart.object_id)
+
+    data = await run_in_threadpool(downsample, times, values, width, method.value)
+    return {"chart_id": chart_id, "res_id": chart.object_id, "method": method.value,
+            "total_points": len(times), "data": data}
+
 @app.post('/chart/', tags=["Charts"])
 async def create_chart(chart: SchemaChart):
     new_control = ModelBpsimModelControl(model_id=chart.model_id, type = ControlType.CHART,
@@ -487,6 +794,11 @@ async def delete_chart(id: int):
     delete_model_control_by_id(chart.control_id)
     return {"status": "success", "message": f"Диаграмма '{name}' успешно удалена"}
 
+@app.get("/metrics", tags=["Connections"])
+async def get_metrics():
+    """Метрики приложения в текстовом формате Prometheus"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/", tags=["Connections"])
 async def ping():
     """Home endpoint"""
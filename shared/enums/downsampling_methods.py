@@ -0,0 +1,4 @@
+from enum import Enum
+class DownsamplingMethod(str, Enum):
+    LTTB = "lttb"
+    MINMAX = "minmax"
\ No newline at end of file
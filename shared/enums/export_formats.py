@@ -0,0 +1,4 @@
+from enum import Enum
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
\ No newline at end of file
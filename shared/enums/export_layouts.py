@@ -0,0 +1,4 @@
+from enum import Enum
+class ExportLayout(str, Enum):
+    DENSE = "dense"
+    SPARSE = "sparse"
\ No newline at end of file
@@ -0,0 +1,5 @@
+from enum import IntEnum
+class ReportLevel(IntEnum):
+    NONE = 0
+    SUMMARY = 1
+    FULL = 2
\ No newline at end of file
@@ -0,0 +1,5 @@
+from enum import Enum
+class SimulationEngine(str, Enum):
+    SIMPY = "simpy"
+    FAST = "fast"
+    COMPILED = "compiled"
\ No newline at end of file
@@ -0,0 +1,190 @@
+import bisect
+import threading
+import time
+
+from sqlalchemy import event
+
+#границы интервалов гистограммы времени обработки запросов, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    """Возвращает метки значения метрики в текстовом формате Prometheus"""
+    items = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        items.append(extra)
+    return "{" + ",".join(items) + "}" if items else ""
+
+class Metric:
+    """Метрика со значениями по набору меток"""
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, labels: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def render(self) -> [str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        with self.lock:
+            values = list(self.values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Counter(Metric):
+    """Счетчик, который только увеличивается"""
+    type = "counter"
+
+    def inc(self, *label_values, value: float = 1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + value
+
+class Gauge(Metric):
+    """Текущее значение, которое может увеличиваться и уменьшаться"""
+    type = "gauge"
+
+    def inc(self, *label_values, value: float = 1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + value
+
+    def dec(self, *label_values, value: float = 1):
+        self.inc(*label_values, value=-value)
+
+    def set(self, *label_values, value: float):
+        with self.lock:
+            self.values[label_values] = value
+
+class Histogram(Metric):
+    """Распределение значений по интервалам с суммой и количеством"""
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+
+    def observe(self, *label_values, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(label_values)
+            if counts is None:
+                #счетчики по интервалам (последний - больше всех границ), сумма и количество
+                counts = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def render(self) -> [str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        with self.lock:
+            values = [(label_values, list(counts)) for label_values, counts in self.values.items()]
+        for label_values, counts in values:
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                labels = format_labels(self.labels, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {total}")
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {counts[-2]}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Набор метрик приложения. Значения, которые не обновляются по ходу работы
+    (например, состояние пула соединений), считываются функциями-сборщиками при каждом запросе метрик"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus"""
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.add(Counter("bpsim_http_requests_total", "Количество обработанных запросов",
+                                    ("method", "route", "status")))
+http_request_duration = metrics.add(Histogram("bpsim_http_request_duration_seconds",
+                                              "Время обработки запросов, секунды", ("method", "route")))
+http_requests_in_flight = metrics.add(Gauge("bpsim_http_requests_in_flight",
+                                            "Количество запросов, обрабатываемых в данный момент"))
+db_pool_connections = metrics.add(Gauge("bpsim_db_pool_connections",
+                                        "Соединения пула БД по состоянию", ("state",)))
+db_connection_checkouts = metrics.add(Counter("bpsim_db_connection_checkouts_total",
+                                              "Количество выдач соединений из пула БД"))
+simulation_runs = metrics.add(Counter("bpsim_simulation_runs_total", "Количество проведенных симуляций",
+                                      ("kind",)))
+simulation_events = metrics.add(Counter("bpsim_simulation_events_total",
+                                        "Количество событий (выполнений узлов) в симуляциях"))
+simulation_resource_changes = metrics.add(Counter("bpsim_simulation_resource_changes_total",
+                                                  "Количество изменений ресурсов в симуляциях"))
+simulation_time = metrics.add(Counter("bpsim_simulation_time_total", "Суммарное смоделированное время"))
+simulation_cache_requests = metrics.add(Counter("bpsim_simulation_cache_requests_total",
+                                                "Обращения к кэшу симуляции", ("cache", "result")))
+
+def watch_db_pool(engine):
+    """Добавляет метрики пула соединений движка SQLAlchemy"""
+    pool = engine.pool
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(*args):
+        db_connection_checkouts.inc()
+
+    def collect():
+        #у пулов без ограничения размера (например, NullPool) части показателей нет
+        for state, method in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"),
+                              ("overflow", "overflow")):
+            if hasattr(pool, method):
+                #overflow пула отрицателен, пока открыто меньше соединений, чем размер пула
+                db_pool_connections.set(state, value=max(getattr(pool, method)(), 0))
+    metrics.add_collector(collect)
+
+class MetricsMiddleware:
+    """ASGI middleware: время обработки, количество и число одновременных запросов по маршрутам.
+    Маршрут берется из шаблона пути (/start/{sub_area_id}/{model_id}/), чтобы число меток не росло с числом id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            #запросы по несуществующим путям объединяются под одной меткой
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(scope["method"], path, value=duration)
+            http_requests.inc(scope["method"], path, str(status))
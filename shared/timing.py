@@ -0,0 +1,38 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("bpsim.timing")
+
+class PhaseTimer:
+    """Замеряет время этапов обработки запроса. Время этапа с одним именем суммируется"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.start
+
+    def get_server_timing(self) -> str:
+        """Возвращает значение заголовка Server-Timing (время в миллисекундах)"""
+        items = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        items.append(f"total;dur={self.total * 1000:.2f}")
+        return ", ".join(items)
+
+    def log(self, message: str, **fields):
+        """Пишет в журнал структурированную запись со временем этапов и дополнительными полями"""
+        record = {"message": message, **fields,
+                  "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+                  "total_ms": round(self.total * 1000, 3)}
+        logger.info(json.dumps(record, ensure_ascii=False, default=str), extra={"timing": record})
@@ -6,6 +6,12 @@ from db.models import Node
 from db.models import Resource as ModelRes
 from db.schemas import Resource as SchemaRes
 from db.schemas import Node as SchemaNode
+from db.schemas import MonteCarlo as SchemaMonteCarlo
+from db.schemas import Sweep as SchemaSweep
+from db.schemas import Checkpoint as SchemaCheckpoint
+from simulation.distributions import parse_distribution
+from simulation.sim import check_durations
+from simulation.config import simulation_settings
 
 from fastapi_sqlalchemy import db
 from sqlalchemy import and_
@@ -36,4 +42,66 @@ def check_node_name_unique(node: SchemaNode, id: int):
         and_(Node.model_id == node.model_id, Node.name == node.name,
              Node.id != id)).first()
     if another_items:
-        raise HTTPException(status_code=409, detail='Узел с таким именем уже есть')
\ No newline at end of file
+        raise HTTPException(status_code=409, detail='Узел с таким именем уже есть')
+
+def check_distribution(spec: str):
+    if spec is None:
+        return
+    try:
+        parse_distribution(spec)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+def check_monte_carlo_settings(settings: SchemaMonteCarlo):
+    if not 1 <= settings.replications <= 100000:
+        raise HTTPException(status_code=400, detail='Количество повторов должно быть от 1 до 100000')
+    if not 2 <= settings.points <= 10000:
+        raise HTTPException(status_code=400, detail='Количество точек должно быть от 2 до 10000')
+    if settings.batch_size < 1:
+        raise HTTPException(status_code=400, detail='Размер пакета должен быть больше нуля')
+    if not 0 < settings.confidence_level < 1:
+        raise HTTPException(status_code=400, detail='Уровень доверия должен быть между 0 и 1')
+    if any(not 0 <= percentile <= 100 for percentile in settings.percentiles):
+        raise HTTPException(status_code=400, detail='Процентили должны быть от 0 до 100')
+    for node in settings.nodes.values():
+        check_distribution(node.duration)
+        check_distribution(node.cost)
+
+def check_monte_carlo_size(settings: SchemaMonteCarlo, resource_count: int):
+    """Проверяет, что траектории всех ресурсов во всех повторах помещаются в память"""
+    max_values = simulation_settings.SIMULATION_MONTE_CARLO_MAX_VALUES
+    if resource_count * settings.points * settings.replications > max_values:
+        raise HTTPException(status_code=400,
+                            detail=f'Произведение числа ресурсов, точек и повторов должно быть не больше {max_values}')
+
+def check_sweep_size(sweep: SchemaSweep, resource_count: int, event_count: int):
+    """Проверяет, что состояние всех сценариев серии помещается в память"""
+    max_values = simulation_settings.SIMULATION_SWEEP_MAX_VALUES
+    if len(sweep.scenarios) * max(resource_count, 1) * max(event_count, 1) > max_values:
+        raise HTTPException(status_code=400,
+                            detail=f'Произведение числа сценариев, ресурсов и узлов должно быть не больше {max_values}')
+
+def check_time_limit(time_limit: int):
+    if time_limit <= 0:
+        raise HTTPException(status_code=400, detail='Время симуляции должно быть больше нуля')
+
+def check_model_durations(events: []):
+    try:
+        check_durations(events)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+def check_checkpoint(checkpoint: SchemaCheckpoint, events: [], time_limit: int):
+    if time_limit <= checkpoint.time_limit:
+        raise HTTPException(status_code=400,
+                            detail='Время продолжения симуляции должно быть больше времени контрольной точки')
+    if not 0 <= checkpoint.event_index < len(events) or events[checkpoint.event_index].id != checkpoint.event_id:
+        raise HTTPException(status_code=409, detail='Модель изменилась после создания контрольной точки')
+
+def check_page_limit(limit: int):
+    if not 1 <= limit <= 10000:
+        raise HTTPException(status_code=400, detail='Размер страницы должен быть от 1 до 10000')
+
+def check_chart_width(width: int):
+    if not 3 <= width <= 10000:
+        raise HTTPException(status_code=400, detail='Ширина диаграммы должна быть от 3 до 10000 точек')
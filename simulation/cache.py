@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from simulation.config import simulation_settings
+
+def get_model_key(events: [], sub_area_resources: []) -> str:
+    """Возвращает хэш входных данных модели: упорядоченных узлов с их свойствами и формулами
+    и ресурсов ПО с их значениями"""
+    data = {
+        "events": [[event.id, event.name, event.cost, event.duration, event.duration_spec,
+                    [res.value for res in event.db_resources_in],
+                    [res.value for res in event.db_resources_out]]
+                   for event in events],
+        "resources": [[res.id, res.name, res.sys_name, res.current_value, res.min_value, res.max_value]
+                      for res in sub_area_resources],
+    }
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False, default=str).encode()).hexdigest()
+
+def get_result_key(model_key: str, *params) -> str:
+    """Возвращает ключ результата симуляции по хэшу модели и параметрам запуска"""
+    return hashlib.sha256(json.dumps([model_key, *params], default=str).encode()).hexdigest()
+
+class LocalGeneration:
+    """Версия данных, известная только текущему процессу"""
+
+    def __init__(self):
+        self.value = uuid.uuid4().hex
+
+    def get(self) -> str:
+        return self.value
+
+    def bump(self):
+        self.value = uuid.uuid4().hex
+
+class ResultCache:
+    """Кэш результатов симуляции, адресуемый по хэшу входных данных.
+
+    Хранит готовые ответы в виде байтов: в памяти процесса (LRU) и, если задан каталог,
+    на диске, общем для всех процессов сервера. Оба уровня ограничены по размеру.
+    Для повторных запусков без загрузки модели хранит план последней загруженной
+    версии модели. План действителен, пока не изменилась версия данных generation_store;
+    чтобы изменение модели в одном процессе сбрасывало планы во всех,
+    версия должна храниться в общем для них месте (см. simulation.storage.DatabaseGeneration)"""
+
+    def __init__(self, max_size: int, directory: str = None, max_disk_size: int = 0, generation_store=None):
+        self.max_size = max_size
+        self.directory = directory
+        self.max_disk_size = max_disk_size
+        self.entries = OrderedDict()
+        self.size = 0
+        #планы загруженных моделей: (id ПО, id модели) -> (план, поколение)
+        self.plans = {}
+        #хранилище версии данных: get() возвращает текущую версию, bump() меняет ее
+        self.generation_store = generation_store or LocalGeneration()
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get_generation(self) -> str:
+        """Возвращает метку версии данных: меняется при каждом изменении моделей"""
+        return self.generation_store.get()
+
+    def invalidate(self):
+        """Сбрасывает планы загруженных моделей после изменения модели или ресурсов"""
+        with self.lock:
+            self.plans.clear()
+        self.generation_store.bump()
+
+    def get_plan(self, sub_area_id: int, model_id: int, generation: str):
+        """Возвращает план модели, если он загружен при текущей версии данных generation, иначе None"""
+        with self.lock:
+            plan, plan_generation = self.plans.get((sub_area_id, model_id), (None, None))
+        return plan if plan_generation == generation else None
+
+    def get_loaded_plan(self, sub_area_id: int, model_id: int, key: str):
+        """Возвращает сохраненный план модели, если он построен по тем же данным (хэш модели равен key)"""
+        with self.lock:
+            plan, _ = self.plans.get((sub_area_id, model_id), (None, None))
+        return plan if plan is not None and plan.key == key else None
+
+    def set_plan(self, sub_area_id: int, model_id: int, plan, generation: str):
+        """Запоминает план модели, загруженной при указанной версии данных"""
+        if generation != self.get_generation():
+            # модель изменилась во время загрузки
+            return
+        with self.lock:
+            self.plans[(sub_area_id, model_id)] = (plan, generation)
+
+    def get(self, key: str):
+        """Возвращает сохраненный результат или None"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                return value
+        if not self.directory:
+            return None
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as file:
+                value = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self.put_in_memory(key, value)
+        return value
+
+    def put(self, key: str, value: bytes):
+        """Сохраняет результат"""
+        self.put_in_memory(key, value)
+        if self.directory and len(value) <= self.max_disk_size:
+            path = self.get_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.write_file(path, value)
+            self.evict_from_disk()
+
+    def put_in_memory(self, key: str, value: bytes):
+        """Сохраняет результат в памяти, вытесняя давно не использованные"""
+        if len(value) > self.max_size:
+            return
+        with self.lock:
+            old_value = self.entries.pop(key, None)
+            if old_value is not None:
+                self.size -= len(old_value)
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_size:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def evict_from_disk(self):
+        """Удаляет с диска давно не использованные результаты, пока их размер больше допустимого"""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+        total_size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_size <= self.max_disk_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    @staticmethod
+    def write_file(path: str, value: bytes):
+        """Записывает файл атомарно, чтобы другие процессы не прочитали его частично"""
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(value)
+        os.replace(temp_path, path)
+
+simulation_cache = ResultCache(simulation_settings.SIMULATION_CACHE_SIZE, simulation_settings.SIMULATION_CACHE_DIR,
+                               simulation_settings.SIMULATION_CACHE_DISK_SIZE)
@@ -0,0 +1,138 @@
+import math
+import operator
+import threading
+
+from simulation.event_log import EventCode
+from simulation.formula import ResOperation
+
+#операции над ресурсами, которые записываются в код операторами Python
+OPERATORS = {operator.add: '+', operator.sub: '-', operator.mul: '*', operator.truediv: '/'}
+#наибольшее число скомпилированных циклов, хранимых в процессе
+MAX_CACHED_CYCLES = 32
+
+_cycles = {}
+_lock = threading.Lock()
+
+class CompiledCycle:
+    """Функция, выполняющая полный цикл событий модели, и суммарная длительность цикла"""
+    __slots__ = ('function', 'source', 'duration', 'error')
+
+    def __init__(self, function, source: str, duration: float, error: float):
+        self.function = function
+        self.source = source
+        self.duration = duration
+        #относительная погрешность суммы длительностей при последовательном сложении
+        self.error = error
+
+    def fits(self, time: float, time_limit: float) -> bool:
+        """Проверяет, что все события цикла, начатого в момент time, закончатся до конца симуляции"""
+        return (time + self.duration) * (1 + self.error) < time_limit
+
+class CycleCode:
+    """Исходный код функции цикла. Номера ресурсов, пределы, длительности и затраты
+    записываются в код константами; остальные значения передаются через пространство имен функции"""
+
+    def __init__(self, mins, maxs, full_log: bool):
+        self.mins = mins
+        self.maxs = maxs
+        self.full_log = full_log
+        self.lines = ["def cycle(v, time, cost, times_append, indexes_append, values_append, add_errors, "
+                      "records_append):"]
+        self.namespace = {'EventCode': EventCode}
+
+    def constant(self, value) -> str:
+        """Возвращает литерал для конечного числа, иначе имя значения в пространстве имен"""
+        if type(value) in (int, float) and math.isfinite(value):
+            return repr(value)
+        name = f"c{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def add(self, line: str):
+        self.lines.append("    " + line)
+
+    def add_operation(self, operation: ResOperation):
+        """Добавляет код операции над ресурсом так же, как ее выполняет SimulationRun.change_resources"""
+        if operation.errors:
+            self.add(f"add_errors({self.constant(operation.errors)})")
+            return
+        target = operation.target
+        if self.full_log:
+            self.add(f"old = v[{target}]")
+        operand = self.constant(operation.operand)
+        if operation.operand_res is not None:
+            # значение операнда читается до изменения цели, которая может с ним совпадать
+            self.add(f"y = v[{operation.operand_res}]")
+            operand = "y"
+
+        if operation.function is None:
+            # неизвестная операция не меняет значение ресурса
+            self.add(f"x = v[{target}]")
+        elif operation.function in OPERATORS:
+            self.add(f"x = v[{operation.source}] {OPERATORS[operation.function]} {operand}")
+            min_value, max_value = self.mins[target], self.maxs[target]
+            # сравнение с NaN (предел не задан) всегда ложно, поэтому такая проверка не нужна
+            condition = "if"
+            if not math.isnan(min_value):
+                self.add(f"if x < {self.constant(min_value)}:")
+                self.add(f"    x = {self.constant(min_value)}")
+                condition = "elif"
+            if not math.isnan(max_value):
+                self.add(f"{condition} x > {self.constant(max_value)}:")
+                self.add(f"    x = {self.constant(max_value)}")
+        else:
+            # прочие операции выполняются интерпретатором формул
+            self.add(f"x = {self.constant(operation)}.calculate(v, {self.constant(self.mins)}, "
+                     f"{self.constant(self.maxs)})")
+
+        self.add(f"v[{target}] = x")
+        self.add(f"times_append(time); indexes_append({target}); values_append(x)")
+        if self.full_log:
+            operand_value = "None" if operation.operand_res is None else "y"
+            self.add(f"records_append((EventCode.OPERATION, {self.constant(operation)}, {operand_value}, old, x))")
+
+    def add_event(self, event, operations_in: [ResOperation], operations_out: [ResOperation]):
+        """Добавляет код события так же, как его выполняет FastSimulationRun.run_events"""
+        self.add("start = time")
+        if self.full_log:
+            self.add(f"records_append((EventCode.NODE_START, {self.constant(event.name)}, time))")
+        for operation in operations_in:
+            self.add_operation(operation)
+        self.add(f"cost += {self.constant(event.cost)}")
+        self.add(f"time = time + {self.constant(event.duration)}")
+        for operation in operations_out:
+            self.add_operation(operation)
+        if self.full_log:
+            self.add(f"records_append((EventCode.NODE_END, {self.constant(event.name)}, time))")
+            self.add("records_append((EventCode.SEPARATOR,))")
+
+def compile_cycle(compiled_events: [], state, full_log: bool = False) -> CompiledCycle:
+    """Генерирует функцию, выполняющую все события модели по порядку.
+
+    Функция принимает текущие значения ресурсов, время начала цикла и затраты,
+    записывает изменения ресурсов и возвращает время начала последнего события,
+    время окончания цикла и затраты"""
+    code = CycleCode(state.min_values, state.max_values, full_log)
+    duration = 0
+    for event, operations_in, operations_out in compiled_events:
+        code.add_event(event, operations_in, operations_out)
+        duration += event.duration
+    code.add("return start, time, cost")
+
+    source = "\n".join(code.lines)
+    exec(compile(source, "<bpsim-cycle>", "exec"), code.namespace)
+    # оценка сверху погрешности последовательного сложения неотрицательных длительностей
+    error = 2 * (len(compiled_events) + 1) * 2 ** -53
+    return CompiledCycle(code.namespace['cycle'], source, duration, error)
+
+def get_cycle(plan, full_log: bool = False) -> CompiledCycle:
+    """Возвращает функцию цикла для плана модели, генерируя ее при первом обращении"""
+    key = (plan.key, full_log)
+    cycle = _cycles.get(key)
+    if cycle is None:
+        cycle = compile_cycle(plan.compiled_events, plan.state, full_log)
+        with _lock:
+            if len(_cycles) >= MAX_CACHED_CYCLES:
+                _cycles.pop(next(iter(_cycles)))
+            _cycles[key] = cycle
+    return cycle
@@ -0,0 +1,26 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings
+
+
+class SimulationSettings(BaseSettings):
+    # режим выполнения симуляции: inline - в цикле событий,
+    # thread - в пуле потоков, process - в пуле процессов. Другие значения - ошибка при запуске
+    SIMULATION_EXECUTOR: Literal["inline", "thread", "process"] = "thread"
+    # количество процессов в пуле (по умолчанию - по числу ядер)
+    SIMULATION_WORKERS: int | None = None
+    # размер кэша результатов в памяти процесса, байт
+    SIMULATION_CACHE_SIZE: int = 64 * 1024 * 1024
+    # каталог кэша результатов, общего для всех процессов (по умолчанию - только кэш в памяти)
+    SIMULATION_CACHE_DIR: str | None = None
+    # размер кэша результатов на диске, байт
+    SIMULATION_CACHE_DISK_SIZE: int = 1024 * 1024 * 1024
+    # память на состояния ресурсов для поиска установившегося режима в одном запуске, байт
+    SIMULATION_STEADY_STATE_MEMORY: int = 16 * 1024 * 1024
+    # наибольшее число значений ресурсов в траекториях Монте-Карло (ресурсы x точки x повторы)
+    SIMULATION_MONTE_CARLO_MAX_VALUES: int = 20_000_000
+    # наибольший размер серии сценариев (сценарии x ресурсы x узлы)
+    # и число сохраняемых изменений ресурсов по всем сценариям при include_series
+    SIMULATION_SWEEP_MAX_VALUES: int = 20_000_000
+
+simulation_settings = SimulationSettings()
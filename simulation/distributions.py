@@ -0,0 +1,86 @@
+import re
+import numpy as np
+
+# названия распределений и количество их параметров
+DISTRIBUTION_PARAMS = {
+    'uniform': 2,      # uniform(минимум, максимум)
+    'normal': 2,       # normal(среднее, стандартное отклонение)
+    'triangular': 3,   # triangular(минимум, мода, максимум)
+    'exponential': 1,  # exponential(среднее)
+}
+
+SPEC_PATTERN = re.compile(r'^\s*([a-z]+)\s*\(([^()]*)\)\s*$')
+
+class Distribution:
+    """Случайная величина, заданная строкой вида 'normal(5, 1)' или числом"""
+
+    def __init__(self, name: str, params: [float]):
+        self.name = name
+        self.params = params
+
+    @property
+    def is_constant(self) -> bool:
+        return self.name == 'constant'
+
+    @property
+    def mean(self) -> float:
+        """Математическое ожидание величины"""
+        if self.name == 'uniform':
+            return (self.params[0] + self.params[1]) / 2
+        if self.name == 'triangular':
+            return sum(self.params) / 3
+        return self.params[0]
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """Возвращает size случайных значений величины"""
+        if self.name == 'uniform':
+            return rng.uniform(self.params[0], self.params[1], size)
+        if self.name == 'normal':
+            return rng.normal(self.params[0], self.params[1], size)
+        if self.name == 'triangular':
+            return rng.triangular(self.params[0], self.params[1], self.params[2], size)
+        if self.name == 'exponential':
+            return rng.exponential(self.params[0], size)
+        return np.full(size, self.params[0], dtype=float)
+
+def parse_distribution(spec) -> Distribution:
+    """Разбирает описание распределения: число или 'название(параметры)'"""
+    if isinstance(spec, (int, float)):
+        return Distribution('constant', [float(spec)])
+    try:
+        return Distribution('constant', [float(spec)])
+    except ValueError:
+        pass
+
+    match = SPEC_PATTERN.match(spec.lower())
+    if not match or match.group(1) not in DISTRIBUTION_PARAMS:
+        raise ValueError(f"Неизвестное распределение '{spec}'. "
+                         f"Допустимы: число, {', '.join(name + '(...)' for name in DISTRIBUTION_PARAMS)}")
+    name = match.group(1)
+    try:
+        params = [float(param) for param in match.group(2).split(',')]
+    except ValueError:
+        raise ValueError(f"Параметры распределения '{spec}' должны быть числами")
+    if len(params) != DISTRIBUTION_PARAMS[name]:
+        raise ValueError(f"Распределение {name} принимает {DISTRIBUTION_PARAMS[name]} параметра(ов)")
+
+    if name == 'uniform' and params[0] > params[1]:
+        raise ValueError(f"В распределении '{spec}' минимум больше максимума")
+    if name == 'triangular' and not params[0] <= params[1] <= params[2]:
+        raise ValueError(f"В распределении '{spec}' должно выполняться минимум <= мода <= максимум")
+    if name in ('normal', 'exponential') and params[-1] < 0:
+        raise ValueError(f"Параметр распределения '{spec}' не может быть отрицательным")
+    # вырожденные распределения принимают одно значение
+    if name in ('uniform', 'triangular') and params[0] == params[-1]:
+        return Distribution('constant', [params[0]])
+    if name in ('normal', 'exponential') and params[-1] == 0:
+        return Distribution('constant', [params[0]])
+    return Distribution(name, params)
+
+def get_expected_duration(spec: str):
+    """Возвращает длительность узла для детерминированной симуляции.
+    Для случайной длительности используется ее математическое ожидание"""
+    try:
+        return int(spec)
+    except ValueError:
+        return parse_distribution(spec).mean
@@ -0,0 +1,58 @@
+import numpy as np
+
+def get_bucket_point(values: np.ndarray, function) -> int:
+    """Возвращает номер точки участка по функции nanargmin/nanargmax (0, если все значения не числа)"""
+    if np.isnan(values).all():
+        return 0
+    return int(function(values))
+
+def lttb(times: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """Возвращает номера точек ряда, выбранных методом Largest-Triangle-Three-Buckets.
+
+    Первая и последняя точки сохраняются, остальные делятся на threshold - 2 участка,
+    из каждого берется точка, образующая наибольший треугольник с выбранной точкой
+    предыдущего участка и средней точкой следующего"""
+    count = len(times)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    edges = np.append(np.linspace(1, count - 1, threshold - 1).astype(int), count)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        average_time = times[next_start:next_end].mean()
+        average_value = np.nanmean(values[next_start:next_end]) \
+            if not np.isnan(values[next_start:next_end]).all() else values[previous]
+        areas = np.abs((times[previous] - average_time) * (values[start:end] - values[previous])
+                       - (times[previous] - times[start:end]) * (average_value - values[previous]))
+        previous = start + get_bucket_point(areas, np.nanargmax)
+        selected[bucket + 1] = previous
+    selected[-1] = count - 1
+    return selected
+
+def min_max(times: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """Возвращает номера точек ряда: минимум и максимум на каждом из threshold / 2 участков,
+    а также первую и последнюю точки"""
+    count = len(times)
+    buckets = threshold // 2
+    if threshold >= count or buckets < 1:
+        return np.arange(count)
+    edges = np.linspace(0, count, buckets + 1).astype(int)
+    selected = {0, count - 1}
+    for start, end in zip(edges[:-1], edges[1:]):
+        if start == end:
+            continue
+        selected.add(start + get_bucket_point(values[start:end], np.nanargmin))
+        selected.add(start + get_bucket_point(values[start:end], np.nanargmax))
+    return np.array(sorted(selected))
+
+def downsample(times, values, threshold: int, method: str = "lttb") -> list:
+    """Возвращает не больше threshold (для min_max - threshold + 2) точек ряда для построения диаграммы"""
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    function = min_max if method == "minmax" else lttb
+    with np.errstate(invalid='ignore'):
+        indexes = function(times, values, threshold)
+    return [{'value': None if np.isnan(values[index]) else float(values[index]), 'time': float(times[index])}
+            for index in indexes]
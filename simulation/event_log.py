@@ -0,0 +1,84 @@
+from enum import IntEnum
+
+from shared.enums.report_levels import ReportLevel
+
+class EventCode(IntEnum):
+    NODE_START = 0
+    NODE_END = 1
+    OPERATION = 2
+    ERROR = 3
+    SEPARATOR = 4
+    SIMULATION_END = 5
+
+class EventLog:
+    """Журнал событий симуляции. Хранит коды событий и их аргументы,
+    а текст отчета формирует только по запросу"""
+
+    def __init__(self, level: ReportLevel = ReportLevel.FULL):
+        self.level = level
+        self.is_full = level >= ReportLevel.FULL
+        self.records = []
+        self.reported_errors = set()
+        # количество записей, удаленных из журнала методом clear
+        self.offset = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def add_errors(self, errors: [str]):
+        """Добавляет ошибки в журнал. В кратком отчете каждая ошибка попадает один раз"""
+        if self.is_full:
+            self.records.extend((EventCode.ERROR, error) for error in errors)
+        elif self.level >= ReportLevel.SUMMARY:
+            for error in errors:
+                if error not in self.reported_errors:
+                    self.reported_errors.add(error)
+                    self.records.append((EventCode.ERROR, error))
+
+    def add_simulation_end(self, time_limit: float, cost: float):
+        """Добавляет в журнал итоги симуляции"""
+        if self.level >= ReportLevel.SUMMARY:
+            self.records.append((EventCode.SIMULATION_END, time_limit, cost))
+
+    def clear(self):
+        """Удаляет записи журнала"""
+        self.offset += len(self.records)
+        self.records = []
+
+    def get_segment(self, start: int) -> list:
+        """Возвращает копию записей, начиная с указанного номера (с учетом удаленных)"""
+        return self.records[start - self.offset:]
+
+    def add_segment(self, segment: list, time_shift: float):
+        """Повторяет участок журнала со сдвигом по времени"""
+        for record in segment:
+            if record[0] == EventCode.NODE_START or record[0] == EventCode.NODE_END:
+                record = (record[0], record[1], record[2] + time_shift)
+            self.records.append(record)
+
+    def render(self) -> [str]:
+        """Формирует текст отчета по записям журнала"""
+        report = []
+        for record in self.records:
+            code = record[0]
+            if code == EventCode.NODE_START:
+                report.append(f'{record[1]} - начало в {record[2]}')
+            elif code == EventCode.NODE_END:
+                report.append(f'{record[1]} - окончание в {record[2]}')
+            elif code == EventCode.OPERATION:
+                _, operation, operand_value, old_value, new_value = record
+                name = operation.res_name
+                math_operation = operation.math_operation if operand_value is None \
+                    else operation.operator + str(operand_value)
+                report.append(f"Выполняется операция {math_operation} над ресурсом {operation.sys_name} '{name}'...")
+                report.append(f"Текущее значение ресурса {name}: {old_value}")
+                report.append(f"Новое значение ресурса {name}: {new_value}")
+            elif code == EventCode.ERROR:
+                report.append(record[1])
+            elif code == EventCode.SEPARATOR:
+                report.append(" ")
+            elif code == EventCode.SIMULATION_END:
+                report.append('Конец симуляции')
+                report.append(f'Время симуляции - {record[1]}')
+                report.append(f'Общие затраты: {record[2]}')
+        return report
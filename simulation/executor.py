@@ -0,0 +1,109 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from starlette.concurrency import run_in_threadpool
+
+from simulation.config import simulation_settings
+from simulation.sim import create_simulation_run, ModelPlan
+from simulation.sweep import ScenarioSweep
+from simulation.monte_carlo import MonteCarloBatch, aggregate_monte_carlo
+from simulation.types import SimulationNodedata, SimulationResource
+from shared.enums.report_levels import ReportLevel
+from shared.enums.simulation_engines import SimulationEngine
+from shared.metrics import simulation_runs, simulation_events, simulation_resource_changes, simulation_time
+
+_process_pool = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Возвращает пул процессов для симуляции, создавая его при первом обращении"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=simulation_settings.SIMULATION_WORKERS)
+    return _process_pool
+
+def shutdown_process_pool():
+    """Останавливает пул процессов"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+async def run_in_simulation_executor(function, *args):
+    """Выполняет функцию симуляции в выбранном режиме, не блокируя цикл событий"""
+    mode = simulation_settings.SIMULATION_EXECUTOR
+    if mode == "process":
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_process_pool(), function, *args)
+    if mode == "thread":
+        return await run_in_threadpool(function, *args)
+    if mode == "inline":
+        return function(*args)
+    raise RuntimeError(f"Неизвестный режим выполнения симуляции: {mode}")
+
+def get_simulation_report(events: [SimulationNodedata], time_limit: int, sub_area_resources: [SimulationResource],
+                          report_level: ReportLevel, engine: SimulationEngine, checkpoint: dict,
+                          plan: ModelPlan) -> tuple:
+    """Проводит симуляцию и возвращает журнал событий, хранилище изменений ресурсов, контрольную точку
+    и количество выполненных событий"""
+    simulation_run = create_simulation_run(events, time_limit, sub_area_resources, report_level, engine,
+                                           checkpoint, plan)
+    (event_log, results, next_checkpoint) = simulation_run.run()
+    return event_log, results, next_checkpoint, simulation_run.event_count
+
+async def run_simulation(events: [SimulationNodedata], time_limit: int, sub_area_resources: [SimulationResource],
+                         report_level: ReportLevel = ReportLevel.FULL,
+                         engine: SimulationEngine = SimulationEngine.SIMPY, checkpoint: dict = None,
+                         plan: ModelPlan = None):
+    """Проводит симуляцию в выбранном режиме, не блокируя цикл событий"""
+    (event_log, results, next_checkpoint, event_count) = await run_in_simulation_executor(
+        get_simulation_report, events, time_limit, sub_area_resources, report_level, engine, checkpoint, plan)
+    simulation_runs.inc(engine.value)
+    simulation_events.inc(value=event_count)
+    simulation_resource_changes.inc(value=len(results))
+    # продолжение моделирует время от конца предыдущего запуска
+    simulation_time.inc(value=time_limit - (checkpoint['time_limit'] if checkpoint else 0))
+    return event_log, results, next_checkpoint
+
+def get_sweep_results(events: [SimulationNodedata], time_limit: int, sub_area_resources: [SimulationResource],
+                      scenarios: [], include_series: bool) -> dict:
+    """Моделирует серию сценариев и возвращает их итоги"""
+    sweep = ScenarioSweep(events, time_limit, sub_area_resources, len(scenarios), include_series,
+                          simulation_settings.SIMULATION_SWEEP_MAX_VALUES)
+    sweep.apply_scenarios(scenarios)
+    return sweep.run()
+
+async def run_sweep(events: [SimulationNodedata], time_limit: int, sub_area_resources: [SimulationResource],
+                    scenarios: [], include_series: bool = False) -> dict:
+    """Моделирует серию сценариев, не блокируя цикл событий"""
+    results = await run_in_simulation_executor(get_sweep_results, events, time_limit, sub_area_resources,
+                                               scenarios, include_series)
+    simulation_runs.inc("sweep", value=len(scenarios))
+    simulation_events.inc(value=sum(scenario["event_count"] for scenario in results["scenarios"]))
+    simulation_time.inc(value=time_limit * len(scenarios))
+    return results
+
+def get_monte_carlo_batch(events: [SimulationNodedata], time_limit: int, sub_area_resources: [SimulationResource],
+                          replications: int, seed: np.random.SeedSequence, node_specs: dict, points: int) -> dict:
+    """Моделирует пакет повторов со случайными длительностями и затратами узлов"""
+    return MonteCarloBatch(events, time_limit, sub_area_resources, replications, seed, node_specs, points).run()
+
+async def run_monte_carlo(events: [SimulationNodedata], time_limit: int, sub_area_resources: [SimulationResource],
+                          replications: int, seed: int = None, node_specs: dict = None, points: int = 100,
+                          batch_size: int = 250, percentiles: [float] = (5, 50, 95),
+                          confidence_level: float = 0.95) -> dict:
+    """Проводит повторы симуляции пакетами параллельно и возвращает статистику по ним"""
+    sizes = [batch_size] * (replications // batch_size)
+    if replications % batch_size:
+        sizes.append(replications % batch_size)
+    # у каждого пакета свой независимый поток случайных чисел, поэтому результат зависит только от seed
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    batches = await asyncio.gather(*[
+        run_in_simulation_executor(get_monte_carlo_batch, events, time_limit, sub_area_resources,
+                                   size, batch_seed, node_specs or {}, points)
+        for size, batch_seed in zip(sizes, seeds)])
+    simulation_runs.inc("monte_carlo", value=replications)
+    simulation_events.inc(value=sum(batch["event_count"] for batch in batches))
+    simulation_time.inc(value=time_limit * replications)
+    return aggregate_monte_carlo(batches, sub_area_resources, time_limit, points, percentiles, confidence_level)
@@ -0,0 +1,65 @@
+import csv
+import io
+import tempfile
+from itertools import islice
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+from simulation.results import SimulationResults
+
+#количество строк таблицы в одной части ответа
+EXPORT_CHUNK_ROWS = 1000
+#размер части файла xlsx в ответе, байт
+EXPORT_CHUNK_BYTES = 64 * 1024
+#максимальное количество строк на листе xlsx
+XLSX_MAX_ROWS = 1048576
+
+def iter_csv(results: SimulationResults, used_only: bool = False):
+    """Формирует csv по частям: заголовки, затем значения ресурсов после каждого изменения"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM нужен, чтобы Excel правильно открыл кириллицу в заголовках
+    buffer.write('\ufeff')
+    writer.writerows(results.get_export_headers(used_only))
+    rows = results.iter_export_rows(used_only)
+    while True:
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        chunk = list(islice(rows, EXPORT_CHUNK_ROWS))
+        if not chunk:
+            break
+        writer.writerows(chunk)
+
+def write_xlsx(results: SimulationResults, used_only: bool = False):
+    """Записывает таблицу экспорта во временный файл xlsx, не держа все строки в памяти.
+    Если строк больше, чем помещается на листе, таблица продолжается на следующих листах"""
+    file = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(file, {'constant_memory': True, 'nan_inf_to_errors': True})
+    headers = results.get_export_headers(used_only)
+    sheet = None
+    row_number = XLSX_MAX_ROWS
+    for row in results.iter_export_rows(used_only):
+        if row_number == XLSX_MAX_ROWS:
+            sheet = workbook.add_worksheet()
+            for row_number, header in enumerate(headers):
+                sheet.write_row(row_number, 0, header)
+            row_number = len(headers)
+        sheet.write_row(row_number, 0, row)
+        row_number += 1
+    if sheet is None:
+        sheet = workbook.add_worksheet()
+        for row_number, header in enumerate(headers):
+            sheet.write_row(row_number, 0, header)
+    workbook.close()
+    file.seek(0)
+    return file
+
+def iter_file(file):
+    """Отдает файл по частям и закрывает его"""
+    with file:
+        while chunk := file.read(EXPORT_CHUNK_BYTES):
+            yield chunk
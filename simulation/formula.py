@@ -0,0 +1,99 @@
+import operator
+
+from simulation.state import ResourceState
+
+# функции для математических операций над ресурсами
+MATH_FUNCTIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+class ResOperation:
+    """Скомпилированная операция над ресурсом вида 'Цель:=Источник<операция><операнд>'.
+    Ресурсы задаются номерами в состоянии ресурсов, поэтому операция не зависит от запуска"""
+    __slots__ = ('formula', 'sys_name', 'res_name', 'target', 'source', 'math_operation', 'operator',
+                 'function', 'operand', 'operand_res', 'errors')
+
+    def __init__(self, formula: str, sys_name: str = None, res_name: str = None, target: int = None,
+                 source: int = None, math_operation: str = '', function=None, operand: float = 0.0,
+                 operand_res: int = None, errors: [str] = None):
+        self.formula = formula
+        self.sys_name = sys_name
+        self.res_name = res_name
+        self.target = target
+        self.source = source
+        self.math_operation = math_operation
+        self.operator = math_operation[:1]
+        self.function = function
+        self.operand = operand
+        self.operand_res = operand_res
+        self.errors = errors or []
+
+    def calculate(self, values, min_values, max_values) -> float:
+        """Вычисляет новое значение целевого ресурса с учетом его пределов"""
+        target = self.target
+        if self.function is None:
+            # неизвестная операция не меняет значение ресурса
+            return values[target]
+        operand = self.operand if self.operand_res is None else values[self.operand_res]
+        new_value = self.function(values[self.source], operand)
+        if new_value < min_values[target]:
+            return min_values[target]
+        if new_value > max_values[target]:
+            return max_values[target]
+        return new_value
+
+def compile_formula(formula: str, state: ResourceState) -> ResOperation:
+    """Разбирает формулу ресурса узла и связывает ее с номерами ресурсов ПО"""
+    slots = state.slots
+    formula_parts = formula.split(":=")
+    if len(formula_parts) < 2:
+        return ResOperation(formula, errors=[f"ОШИБКА! Не удалось разобрать формулу {formula}"])
+
+    sys_name = formula_parts[0]
+    operands = formula_parts[1].translate(str.maketrans({'+': ' ', '-': ' ', '*': ' ', '/': ' '})).split()
+    if not operands:
+        return ResOperation(formula, errors=[f"ОШИБКА! Не удалось разобрать формулу {formula}"])
+
+    other_res_sys_name = operands[0]
+    math_operation = formula_parts[1].removeprefix(other_res_sys_name)
+    last_sys_name = math_operation[1:]
+    is_last_res_sys_name = last_sys_name[1:4] == "Res"
+
+    if ((sys_name not in slots) or (other_res_sys_name not in slots)
+            or (is_last_res_sys_name and last_sys_name not in slots)):
+        errors = []
+        if sys_name not in slots:
+            errors.append(f"ОШИБКА! Ресурс '{sys_name}' не опознан в формуле {formula}")
+        if other_res_sys_name not in slots:
+            errors.append(f"ОШИБКА! Ресурс '{other_res_sys_name}' не опознан в формуле {formula}")
+        if last_sys_name not in slots:
+            errors.append(f"ОШИБКА! Ресурс '{last_sys_name}' не опознан в формуле {formula}")
+        return ResOperation(formula, errors=errors)
+
+    operation = ResOperation(formula, sys_name=sys_name, res_name=state.names[slots[sys_name]],
+                             target=slots[sys_name], source=slots[other_res_sys_name],
+                             math_operation=math_operation)
+    if is_last_res_sys_name:
+        operation.operand_res = slots[last_sys_name]
+        operation.function = MATH_FUNCTIONS.get(operation.operator)
+        return operation
+
+    try:
+        coefficient = float(last_sys_name)
+        if operation.operator in ('+', '-'):
+            # знак операции входит в слагаемое
+            operation.function = operator.add
+            operation.operand = float(math_operation)
+        elif operation.operator in ('*', '/'):
+            operation.function = MATH_FUNCTIONS[operation.operator]
+            operation.operand = coefficient
+    except ValueError:
+        operation.errors.append(f"ОШИБКА! Не удалось разобрать формулу {formula}")
+    return operation
+
+def compile_formulas(node_resources: [], state: ResourceState) -> [ResOperation]:
+    """Компилирует формулы ресурсов узла в список операций"""
+    return [compile_formula(res.value, state) for res in node_resources]
@@ -0,0 +1,63 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db.models import Node as ModelNode
+from db.models import NodeDetail as ModelNodeDetail
+from db.models import NodeRes as ModelNodeRes
+from db.models import Relation as ModelRelation
+from db.models import Resource as ModelResource
+from simulation.distributions import get_expected_duration
+from simulation.types import SimulationNodedata, SimulationNodeRes, SimulationResource
+
+def load_model(session: Session, sub_area_id: int, model_id: int) -> tuple:
+    """Загружает из БД узлы модели с их свойствами и формулами, связи и ресурсы ПО.
+
+    Данные читаются пятью запросами независимо от размера модели: по одному на каждую таблицу,
+    только нужные для симуляции столбцы. Строки группируются по узлам в памяти.
+    Возвращает (узлы, связи, ресурсы ПО)"""
+    nodes = session.execute(select(ModelNode.id, ModelNode.name)
+                            .where(ModelNode.model_id == model_id)).all()
+
+    # у узла используется первое по id описание свойств
+    details = {}
+    for node_id, duration, cost in session.execute(
+            select(ModelNodeDetail.node_id, ModelNodeDetail.duration, ModelNodeDetail.cost)
+            .join(ModelNode, ModelNode.id == ModelNodeDetail.node_id)
+            .where(ModelNode.model_id == model_id)
+            .order_by(ModelNodeDetail.id)):
+        details.setdefault(node_id, (duration, cost))
+
+    # формулы узла: [на входе, на выходе] в порядке id
+    node_resources = {node.id: ([], []) for node in nodes}
+    for res_id, node_id, res_in_out, value in session.execute(
+            select(ModelNodeRes.id, ModelNodeRes.node_id, ModelNodeRes.res_in_out, ModelNodeRes.value)
+            .join(ModelNode, ModelNode.id == ModelNodeRes.node_id)
+            .where(ModelNode.model_id == model_id, ModelNodeRes.res_in_out.in_((0, 1)))
+            .order_by(ModelNodeRes.id)):
+        node_resources[node_id][res_in_out].append(SimulationNodeRes(id=res_id, value=value))
+
+    node_data = []
+    for node in nodes:
+        if node.id not in details:
+            raise ValueError(f"Не заданы свойства узла '{node.name}'")
+        duration, cost = details[node.id]
+        if duration is None:
+            raise ValueError(f"Не задана длительность узла '{node.name}'")
+        if cost is None:
+            raise ValueError(f"Не заданы затраты узла '{node.name}'")
+        resources_in, resources_out = node_resources[node.id]
+        node_data.append(SimulationNodedata(id=node.id, name=node.name, duration=get_expected_duration(duration),
+                                            cost=cost, duration_spec=duration,
+                                            resources_in=resources_in, resources_out=resources_out))
+
+    relations = session.execute(select(ModelRelation.source_id, ModelRelation.target_id)
+                                .where(ModelRelation.model_id == model_id)).all()
+
+    sub_area_resources = [SimulationResource(id=res.id, name=res.name, sys_name=res.sys_name,
+                                             current_value=res.current_value,
+                                             min_value=res.min_value, max_value=res.max_value)
+                          for res in session.execute(
+                              select(ModelResource.id, ModelResource.name, ModelResource.sys_name,
+                                     ModelResource.current_value, ModelResource.min_value, ModelResource.max_value)
+                              .where(ModelResource.sub_area_id == sub_area_id))]
+    return node_data, relations, sub_area_resources
@@ -0,0 +1,106 @@
+from statistics import NormalDist
+
+import numpy as np
+
+from simulation.distributions import parse_distribution
+from simulation.sweep import ScenarioSweep, to_json_list
+
+class MonteCarloBatch(ScenarioSweep):
+    """Пакет повторов симуляции со случайными длительностями и затратами узлов.
+
+    Повторы моделируются одновременно, как сценарии ScenarioSweep. Случайные значения
+    разыгрываются при каждом выполнении узла сразу для всех повторов пакета.
+    Значения ресурсов запоминаются в точках равномерной сетки времени"""
+
+    def __init__(self, events: [], time_limit: int, sub_area_resources: [], replications: int,
+                 seed: np.random.SeedSequence, node_specs: dict, points: int):
+        super().__init__(events, time_limit, sub_area_resources, replications)
+        self.rng = np.random.default_rng(seed)
+        self.replications = replications
+
+        #распределения длительностей и затрат узлов (None - значение не случайное)
+        self.duration_distributions = []
+        self.cost_distributions = []
+        for index, event in enumerate(events):
+            specs = node_specs.get(event.id)
+            duration_spec = specs.duration if specs and specs.duration is not None else event.duration_spec
+            cost_spec = specs.cost if specs and specs.cost is not None else None
+            self.duration_distributions.append(self.get_distribution(duration_spec, self.durations[index]))
+            self.cost_distributions.append(self.get_distribution(cost_spec, self.costs[index]))
+
+        #сетка времени и значения ресурсов в ее точках (ресурс x точка x повтор)
+        self.grid = np.linspace(0, time_limit, points)
+        self.trajectories = np.full((len(self.state), points, replications), np.nan)
+        self.filled_points = np.zeros(replications, dtype=int)
+
+    @staticmethod
+    def get_distribution(spec, expected_values: np.ndarray):
+        """Возвращает распределение для случайной величины и записывает ее ожидание в матрицу значений"""
+        if spec is None:
+            return None
+        distribution = parse_distribution(spec)
+        expected_values[:] = distribution.mean
+        return None if distribution.is_constant else distribution
+
+    def get_durations(self, index: int) -> np.ndarray:
+        distribution = self.duration_distributions[index]
+        if distribution is None:
+            return self.durations[index]
+        # длительность не может быть отрицательной
+        return np.maximum(distribution.sample(self.rng, self.replications), 0.0)
+
+    def get_costs(self, index: int) -> np.ndarray:
+        distribution = self.cost_distributions[index]
+        if distribution is None:
+            return self.costs[index]
+        return distribution.sample(self.rng, self.replications)
+
+    def before_changes(self, time: np.ndarray):
+        """Запоминает текущие значения ресурсов в точках сетки, которые раньше time"""
+        points = np.searchsorted(self.grid, time, side='left')
+        while True:
+            replications = np.nonzero(self.filled_points < points)[0]
+            if not len(replications):
+                break
+            self.trajectories[:, self.filled_points[replications], replications] = self.values[:, replications]
+            self.filled_points[replications] += 1
+
+    def get_results(self) -> dict:
+        """Возвращает затраты и значения ресурсов в точках сетки для каждого повтора
+        и общее число событий пакета"""
+        # после окончания симуляции значения ресурсов больше не меняются
+        self.before_changes(np.full(self.replications, np.inf))
+        return {"cost": self.cost, "event_count": int(self.event_count.sum()), "trajectories": self.trajectories}
+
+def get_statistics(values: np.ndarray, percentiles: [float], confidence_level: float) -> dict:
+    """Возвращает среднее, стандартное отклонение, процентили и доверительный интервал среднего
+    по последней оси массива"""
+    count = values.shape[-1]
+    mean = values.mean(axis=-1)
+    std = values.std(axis=-1, ddof=1) if count > 1 else np.zeros_like(mean)
+    half_width = NormalDist().inv_cdf(0.5 + confidence_level / 2) * std / np.sqrt(count)
+    return {
+        "mean": to_json_list(mean),
+        "std": to_json_list(std),
+        "percentiles": {str(percentile): to_json_list(np.percentile(values, percentile, axis=-1))
+                        for percentile in percentiles},
+        "confidence_interval": [to_json_list(mean - half_width), to_json_list(mean + half_width)],
+    }
+
+def aggregate_monte_carlo(batches: [dict], sub_area_resources: [], time_limit: int, points: int,
+                          percentiles: [float], confidence_level: float) -> dict:
+    """Объединяет результаты пакетов повторов в статистику по затратам и траекториям ресурсов"""
+    cost = np.concatenate([batch["cost"] for batch in batches])
+    sys_names = list(dict.fromkeys(res.sys_name for res in sub_area_resources))
+    with np.errstate(invalid='ignore'):
+        return {
+            "replications": len(cost),
+            "confidence_level": confidence_level,
+            "cost": get_statistics(cost, percentiles, confidence_level),
+            "time": np.linspace(0, time_limit, points).tolist(),
+            # повторы объединяются по одному ресурсу, чтобы не копировать траектории всех ресурсов сразу
+            "trajectories": {sys_name: get_statistics(np.concatenate([batch["trajectories"][index]
+                                                                      for batch in batches], axis=-1),
+                                                      percentiles, confidence_level)
+                             for index, sys_name in enumerate(sys_names)},
+        }
@@ -0,0 +1,126 @@
+from array import array
+
+from simulation.state import ResourceState, from_state_value
+
+class SimulationResults:
+    """Колоночное хранилище изменений ресурсов во время симуляции.
+
+    Каждое изменение записывается в типизированные массивы (время, номер ресурса, значение),
+    а таблицы в формате API формируются только при выдаче результата"""
+
+    def __init__(self, state: ResourceState, sub_area_resources: [], used_slots: frozenset = None):
+        self.ids = list(state.ids)
+        self.names = list(state.names)
+        self.sys_names = list(state.sys_names)
+        self.initial_values = [from_state_value(value) for value in state.values]
+
+        #заголовки и номера ресурсов для столбцов таблицы экспорта
+        self.export_names = [res.name for res in sub_area_resources]
+        self.export_sys_names = [res.sys_name for res in sub_area_resources]
+        self.export_columns = [state.slots[res.sys_name] for res in sub_area_resources]
+        #номера ресурсов, которые используются в формулах модели (None - все ресурсы)
+        self.used_slots = used_slots
+
+        self.times = array('d')
+        self.res_indexes = array('i')
+        self.values = array('d')
+        # количество изменений, удаленных из хранилища методом clear
+        self.offset = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def nbytes(self) -> int:
+        """Размер записанных изменений в байтах"""
+        return sum(column.itemsize * len(column) for column in (self.times, self.res_indexes, self.values))
+
+    def add(self, time: float, res_index: int, value: float):
+        """Записывает изменение значения ресурса"""
+        self.times.append(time)
+        self.res_indexes.append(res_index)
+        self.values.append(value)
+
+    def get_segment(self, start: int) -> tuple:
+        """Возвращает копию изменений, начиная с указанного номера (с учетом удаленных)"""
+        start -= self.offset
+        return self.times[start:], self.res_indexes[start:], self.values[start:]
+
+    def add_segment(self, segment: tuple, time_shift: float):
+        """Повторяет участок изменений со сдвигом по времени"""
+        times, res_indexes, values = segment
+        self.times.extend([time + time_shift for time in times])
+        self.res_indexes.extend(res_indexes)
+        self.values.extend(values)
+
+    def get_chart_table(self) -> list:
+        """Возвращает таблицу изменений ресурсов для построения диаграмм"""
+        ids, names, sys_names = self.ids, self.names, self.sys_names
+        return [{'id': ids[index], 'name': names[index], 'sys_name': sys_names[index], 'value': value, 'time': time}
+                for time, index, value in zip(self.times, self.res_indexes, self.values)]
+
+    def get_series(self, res_id: int) -> tuple:
+        """Возвращает время и значения изменений одного ресурса"""
+        times, values = array('d'), array('d')
+        if res_id not in self.ids:
+            return times, values
+        res_index = self.ids.index(res_id)
+        for time, index, value in zip(self.times, self.res_indexes, self.values):
+            if index == res_index:
+                times.append(time)
+                values.append(value)
+        return times, values
+
+    def get_export_column_numbers(self, used_only: bool = False) -> list:
+        """Возвращает номера столбцов таблицы для экспорта.
+        used_only - только ресурсы, которые модель читает или изменяет"""
+        if not used_only or self.used_slots is None:
+            return list(range(len(self.export_columns)))
+        return [number for number, slot in enumerate(self.export_columns) if slot in self.used_slots]
+
+    def get_export_headers(self, used_only: bool = False) -> list:
+        """Возвращает строки заголовков таблицы для экспорта"""
+        numbers = self.get_export_column_numbers(used_only)
+        return [['Время имитации', *[self.export_names[number] for number in numbers]],
+                ['t', *[self.export_sys_names[number] for number in numbers]]]
+
+    def iter_export_rows(self, used_only: bool = False):
+        """Возвращает по одной строке значения всех ресурсов после каждого изменения"""
+        state = list(self.initial_values)
+        columns = [self.export_columns[number] for number in self.get_export_column_numbers(used_only)]
+        for time, index, value in zip(self.times, self.res_indexes, self.values):
+            state[index] = value
+            yield [time, *[state[column] for column in columns]]
+
+    def get_export_rows(self, used_only: bool = False) -> list:
+        """Возвращает значения всех ресурсов после каждого изменения"""
+        return list(self.iter_export_rows(used_only))
+
+    def get_export_table(self) -> list:
+        """Возвращает таблицу для экспорта: заголовки и значения всех ресурсов после каждого изменения"""
+        return self.get_export_headers() + self.get_export_rows()
+
+    def get_export_changes(self, used_only: bool = True) -> dict:
+        """Возвращает таблицу для экспорта в виде журнала изменений: заголовки, начальные значения
+        и изменения [время, номер столбца, значение]. Строка таблицы get_export_table после изменения -
+        время и значения столбцов с учетом всех изменений до него включительно"""
+        columns = [self.export_columns[number] for number in self.get_export_column_numbers(used_only)]
+        #номера столбцов каждого ресурса (у ресурсов с одинаковым системным именем их несколько)
+        slot_columns = {}
+        for number, slot in enumerate(columns):
+            slot_columns.setdefault(slot, []).append(number)
+        changes = [[time, number, value]
+                   for time, index, value in zip(self.times, self.res_indexes, self.values)
+                   for number in slot_columns.get(index, ())]
+        return {"headers": self.get_export_headers(used_only),
+                "initial_values": [self.initial_values[slot] for slot in columns],
+                "changes": changes}
+
+    def clear(self):
+        """Удаляет записанные изменения, сохраняя достигнутые значения ресурсов"""
+        for index, value in zip(self.res_indexes, self.values):
+            self.initial_values[index] = value
+        self.offset += len(self.times)
+        del self.times[:]
+        del self.res_indexes[:]
+        del self.values[:]
@@ -1,13 +1,21 @@
 import simpy
-from db.models import NodeRes, Resource
-from simulation.types import SimulationRes
+from db.models import Resource
 from simulation.topological_sort import get_sorted_node_ids
+from simulation.formula import ResOperation, compile_formulas
+from simulation.state import ResourceState
+from simulation.results import SimulationResults
+from simulation.event_log import EventLog, EventCode
+from simulation.cache import get_model_key
+from simulation.codegen import get_cycle
+from simulation.config import simulation_settings
+from shared.enums.report_levels import ReportLevel
+from shared.enums.simulation_engines import SimulationEngine
 
 def get_events_list(nodes: [], relations: []) -> list:
     """Возвращает список событий"""
     events_list = []
     #выполняем топологическую сортировку узлов по связям между ними
-    sorted_node_ids = get_sorted_node_ids(relations)
+    sorted_node_ids = get_sorted_node_ids(relations, [node.id for node in nodes])
 
     # создаем словарь для быстрого доступа к узлам по ID
     node_dict = {node.id: node for node in nodes}
@@ -18,164 +26,379 @@ def get_events_list(nodes: [], relations: []) -> list:
             events_list.append(node_dict[node_id])
     return events_list
 
-cost = 0
-report = []
-simulation_res_table = []
-table_for_export = []
-current_res_values = {}
-
-def set_resource_value_in_limits(new_val, min_val, max_val):
-    """Устанавливает значение ресурса в заданных пределах"""
-    if new_val < min_val:
-        return min_val
-    if new_val > max_val:
-        return max_val
-    return new_val
-
-def add_resources_to_export_table(time: float):
-    """Добавляет данные ресурсов в таблицу для экспорта"""
-    global current_res_values, table_for_export
-
-    sys_name_headers = table_for_export[1]
-    sim_values_now = [current_res_values[sys_name]['current_value'] for sys_name in sys_name_headers if sys_name != 't']
-    sim_values_now.insert(0, time)
-
-    table_for_export.append(sim_values_now)
-
-def do_math_operation_on_res(first_value: float, current_value: float, math_operation: str, min_value: float, max_value: float):
-    """Выполняет математическую операцию над ресурсом"""
-    coefficient = float(math_operation[1:])
-
-    if math_operation[0] == "+" or math_operation[0] == "-":
-        current_value = set_resource_value_in_limits(
-            first_value + float(math_operation), min_value,  max_value)
-
-    elif math_operation[0] == "/":
-        current_value = set_resource_value_in_limits(
-            first_value / coefficient, min_value, max_value)
-
-    elif math_operation[0] == "*":
-        current_value = set_resource_value_in_limits(
-            first_value * coefficient,  min_value, max_value)
-
-    return current_value
-
-def change_resources(node_resources: [NodeRes], time: float):
-    """Изменяет ресурсы в рамках одного этапа симуляции"""
-    global current_res_values, simulation_res_table
-    for res in node_resources:
-        formula_parts = res.value.split(":=")
-        sys_name = formula_parts[0]
-        formula = formula_parts[1].translate(str.maketrans({'+': ' ', '-': ' ', '*': ' ', '/': ' '})).split()
-        other_res_sys_name = formula[0]
-        math_operation = formula_parts[1].removeprefix(other_res_sys_name)
-        last_sys_name = math_operation[1:]
-
-        is_last_res_sys_name = last_sys_name[1:4] == "Res"
-
-        if is_last_res_sys_name and last_sys_name in current_res_values:
-            math_operation = math_operation[0] + str(current_res_values[last_sys_name]['current_value'])
-
-
-        if (sys_name not in current_res_values) or (other_res_sys_name not in current_res_values) or (is_last_res_sys_name and last_sys_name not in current_res_values):
-            if sys_name not in current_res_values:
-                report.append(f"ОШИБКА! Ресурс '{sys_name}' не опознан в формуле {res.value}")
-            if other_res_sys_name not in current_res_values:
-                report.append(f"ОШИБКА! Ресурс '{other_res_sys_name}' не опознан в формуле {res.value}")
-            if last_sys_name not in current_res_values:
-                report.append(f"ОШИБКА! Ресурс '{last_sys_name}' не опознан в формуле {res.value}")
-        else:
-            current_res = current_res_values[sys_name]
-
-            report.append(f"Выполняется операция {math_operation} над ресурсом {sys_name} '{current_res['name']}'...")
-
-            report.append(f"Текущее значение ресурса {current_res['name']}: {current_res['current_value']}")
-
-            current_res['current_value'] = do_math_operation_on_res(
-                current_res_values[other_res_sys_name]['current_value'],
-                current_res['current_value'],
-                math_operation,
-                current_res['min_value'],
-                current_res['max_value']
-            )
-
-            simulation_res_table.append(SimulationRes(id=current_res['id'], sys_name=sys_name, time=time,
-                                                          name=current_res['name'],
-                                                      value=current_res['current_value']))
-            report.append(f"Новое значение ресурса {current_res['name']}: {current_res['current_value']}")
-
-            add_resources_to_export_table(time)
-
-def change_resources_out(node_resources_out: [NodeRes], env, duration, name):
-    """Изменяет ресурсы на выходе"""
-    global report
-    yield env.timeout(duration)
-    if len(node_resources_out) > 0:
-        change_resources(node_resources_out, env.now)
-    report.append(f'{name} - окончание в {env.now}')
-
-def start(env, events):
-    """Запускает симуляцию"""
-    global cost, report
-    while True:
-        for event in events:
-            time_start = env.now
-            report.append(f'{event.name} - начало в {time_start}')
-            if len(event.db_resources_in) > 0:
-                change_resources(event.db_resources_in, time_start)
-            cost += event.cost
-            yield env.process(change_resources_out(event.db_resources_out, env, event.duration, event.name))
-            report.append(" ")
-
-def set_export_table_headers(sub_area_resources: [Resource]):
-    """Устанавливает заголовки в таблицу для экспорта"""
-    global table_for_export
-
-    #названия ресурсов
-    export_names = [sub_area.name for sub_area in sub_area_resources]
-    export_names.insert(0, 'Время имитации')
-
-    #системные имена ресурсов
-    export_sys_names = [sub_area.sys_name for sub_area in sub_area_resources]
-    export_sys_names.insert(0, 't')
-
-    table_for_export.append(export_names)
-    table_for_export.append(export_sys_names)
-
-def fill_current_res_values_dict(sub_area_resources: [Resource]):
-    """Заполняет словарь текущих значений ресурсов ПО
-    для хранения информации об изменениях на входе/выходе"""
-    global current_res_values
-    res_values_list = [{'sys_name': res.sys_name,
-                        'id': res.id,
-                        'name': res.name,
-                        'current_value': res.current_value,
-                        'min_value': res.min_value,
-                        'max_value': res.max_value}
-                       for res in sub_area_resources]
-
-    # формируем словарь, где ключ - системное имя ресурса
-    current_res_values = {res['sys_name']: res for res in res_values_list}
-
-def get_report(events: [], time_limit: int, sub_area_resources: [Resource]):
+def check_durations(events: []):
+    """Проверяет, что время модели идет вперед: длительности узлов неотрицательны и их сумма больше нуля.
+    Иначе симуляция не может дойти до конца"""
+    if any(event.duration < 0 for event in events):
+        raise ValueError("Длительность узла не может быть отрицательной")
+    if events and sum(event.duration for event in events) == 0:
+        raise ValueError("Суммарная длительность узлов модели должна быть больше нуля")
+
+def is_integral(value) -> bool:
+    """Проверяет, что число целое (в том числе записанное как float)"""
+    return float(value).is_integer()
+
+class ModelPlan:
+    """Подготовленная к симуляции версия модели: упорядоченные события, скомпилированные формулы
+    и начальное состояние ресурсов. Не меняется после создания, поэтому один план
+    используется всеми запусками модели, пока модель не изменится"""
+    __slots__ = ('events', 'resources', 'state', 'compiled_events', 'used_slots', '_key')
+
+    def __init__(self, events: [], sub_area_resources: [], key: str = None):
+        self.events = tuple(events)
+        self.resources = tuple(sub_area_resources)
+        #начальное состояние ресурсов; формулы ссылаются на ресурсы по его номерам
+        self.state = ResourceState(sub_area_resources)
+        self.compiled_events = tuple((event, tuple(compile_formulas(event.db_resources_in, self.state)),
+                                      tuple(compile_formulas(event.db_resources_out, self.state)))
+                                     for event in self.events)
+        #номера ресурсов, которые формулы модели читают или изменяют
+        self.used_slots = frozenset(slot for _, operations_in, operations_out in self.compiled_events
+                                    for operation in operations_in + operations_out
+                                    for slot in (operation.target, operation.source, operation.operand_res)
+                                    if slot is not None)
+        self._key = key
+
+    @property
+    def key(self) -> str:
+        """Хэш входных данных модели"""
+        if self._key is None:
+            self._key = get_model_key(self.events, self.resources)
+        return self._key
+
+    def create_state(self) -> ResourceState:
+        """Возвращает новое состояние ресурсов для запуска"""
+        return self.state.copy()
+
+class SimulationRun:
+    """Один запуск симуляции. Хранит все состояние эксперимента,
+    поэтому несколько запусков могут выполняться одновременно в потоках или процессах"""
+
+    def __init__(self, events: [], time_limit: int, sub_area_resources: [Resource],
+                 report_level: ReportLevel = ReportLevel.FULL, checkpoint: dict = None, plan: ModelPlan = None):
+        #подготовленная модель; если не передана, готовится для этого запуска
+        self.plan = plan if plan is not None else ModelPlan(events, sub_area_resources)
+        self.events = self.plan.events
+        self.time_limit = time_limit
+        self.cost = 0
+        #количество событий, начатых в этом запуске
+        self.event_count = 0
+        self.log = EventLog(report_level)
+        #контрольная точка, с которой продолжается симуляция
+        self.checkpoint = checkpoint
+        #номер и время начала выполняемого события
+        self.event_index = None
+        self.event_start = None
+
+        #текущие значения ресурсов во время симуляции
+        self.state = self.plan.create_state()
+        if checkpoint is not None:
+            self.restore_checkpoint(checkpoint)
+
+        #хранилище изменений ресурсов для диаграмм и экспорта в csv/xlsx
+        self.results = SimulationResults(self.state, sub_area_resources, self.plan.used_slots)
+
+    def restore_checkpoint(self, checkpoint: dict):
+        """Восстанавливает значения ресурсов и затраты из контрольной точки"""
+        self.state.set_values(checkpoint['values'])
+        self.cost = checkpoint['cost']
+
+    def get_checkpoint(self) -> dict:
+        """Возвращает контрольную точку для продолжения симуляции после time_limit:
+        незавершенное событие, время его начала, затраты и значения ресурсов"""
+        if self.event_index is None:
+            return None
+        return {'time': self.event_start,
+                'time_limit': self.time_limit,
+                'event_index': self.event_index,
+                'event_id': self.events[self.event_index].id,
+                'cost': self.cost,
+                'values': self.state.get_values()}
+
+    def change_resources(self, operations: [ResOperation], time: float):
+        """Изменяет ресурсы в рамках одного этапа симуляции"""
+        log = self.log
+        state = self.state
+        values = state.values
+        for operation in operations:
+            if operation.errors:
+                log.add_errors(operation.errors)
+                continue
+
+            target = operation.target
+            old_value = values[target]
+            if log.is_full:
+                operand_value = None if operation.operand_res is None else values[operation.operand_res]
+
+            new_value = values[target] = operation.calculate(values, state.min_values, state.max_values)
+
+            self.results.add(time, target, new_value)
+            if log.is_full:
+                log.records.append((EventCode.OPERATION, operation, operand_value, old_value, new_value))
+
+    def change_resources_out(self, operations_out: [ResOperation], env, duration, name):
+        """Изменяет ресурсы на выходе"""
+        yield env.timeout(duration)
+        if len(operations_out) > 0:
+            self.change_resources(operations_out, env.now)
+        if self.log.is_full:
+            self.log.records.append((EventCode.NODE_END, name, env.now))
+
+    def compile_events(self) -> tuple:
+        """Возвращает события со скомпилированными формулами ресурсов.
+        Формулы ссылаются на ресурсы по номерам, поэтому берутся из плана без изменений"""
+        return self.plan.compiled_events
+
+    def start(self, env, compiled_events: []):
+        """Запускает симуляцию"""
+        log = self.log
+        index = 0
+        if self.checkpoint is not None:
+            # завершаем событие, выполнявшееся в контрольной точке
+            index = self.checkpoint['event_index']
+            event, _, operations_out = compiled_events[index]
+            self.event_index, self.event_start = index, env.now
+            yield env.process(self.change_resources_out(operations_out, env, event.duration, event.name))
+            if log.is_full:
+                log.records.append((EventCode.SEPARATOR,))
+            index += 1
+
+        while True:
+            while index < len(compiled_events):
+                event, operations_in, operations_out = compiled_events[index]
+                time_start = env.now
+                self.event_index, self.event_start = index, time_start
+                self.event_count += 1
+                index += 1
+                if log.is_full:
+                    log.records.append((EventCode.NODE_START, event.name, time_start))
+                if len(operations_in) > 0:
+                    self.change_resources(operations_in, time_start)
+                self.cost += event.cost
+                yield env.process(self.change_resources_out(operations_out, env, event.duration, event.name))
+                if log.is_full:
+                    log.records.append((EventCode.SEPARATOR,))
+            index = 0
+
+    def create_environment(self) -> simpy.Environment:
+        """Создает окружение simpy с процессом симуляции"""
+        #разбираем формулы ресурсов один раз до запуска симуляции
+        compiled_events = self.compile_events()
+
+        env = simpy.Environment(initial_time=0 if self.checkpoint is None else self.checkpoint['time'])
+        env.process(self.start(env, compiled_events))
+        return env
+
+    def finish(self):
+        """Добавляет в отчет итоги симуляции"""
+        self.log.add_simulation_end(self.time_limit, self.cost)
+
+    def run(self):
+        """Проводит эксперимент и возвращает журнал событий, хранилище изменений ресурсов
+        и контрольную точку для продолжения"""
+        env = self.create_environment()
+        #запускаем симуляцию
+        env.run(until=self.time_limit)
+        self.finish()
+        return self.log, self.results, self.get_checkpoint()
+
+    def steps(self):
+        """Проводит эксперимент, останавливаясь после каждого шага"""
+        env = self.create_environment()
+        # события в момент окончания симуляции не выполняются, как и в env.run(until=...)
+        while env.peek() < self.time_limit:
+            env.step()
+            yield
+
+    def take_chunk(self, with_headers: bool = False) -> dict:
+        """Возвращает накопленную часть результатов и освобождает ее"""
+        export_table = self.results.get_export_headers() if with_headers else []
+        export_table += self.results.get_export_rows()
+        chunk = {"report": self.log.render(), "chart_table": self.results.get_chart_table(),
+                 "export_table": export_table}
+        self.log.clear()
+        self.results.clear()
+        return chunk
+
+    def stream(self, chunk_size: int = 1000):
+        """Проводит эксперимент по шагам и отдает результаты частями по мере их появления.
+        Объединение всех частей совпадает с результатом run()"""
+        is_first_chunk = True
+        for _ in self.steps():
+            if len(self.log) + len(self.results) >= chunk_size:
+                yield self.take_chunk(with_headers=is_first_chunk)
+                is_first_chunk = False
+        self.finish()
+        chunk = self.take_chunk(with_headers=is_first_chunk)
+        chunk["checkpoint"] = self.get_checkpoint()
+        yield chunk
+
+class FastSimulationRun(SimulationRun):
+    """Запуск симуляции без simpy. Модель - последовательный цикл событий,
+    поэтому достаточно счетчика времени, который сдвигается на длительность каждого события.
+    Результаты совпадают с результатами SimulationRun"""
+
+    # поиск повторяющегося состояния ресурсов в начале цикла
+    detect_steady_state = True
+    # наибольший суммарный размер запоминаемых состояний ресурсов, байт
+    max_cycle_bytes = simulation_settings.SIMULATION_STEADY_STATE_MEMORY
+
+    def run(self):
+        """Проводит эксперимент и возвращает журнал событий, хранилище изменений ресурсов
+        и контрольную точку для продолжения"""
+        for _ in self.steps():
+            pass
+        self.finish()
+        return self.log, self.results, self.get_checkpoint()
+
+    def steps(self):
+        """Проводит эксперимент, останавливаясь после каждого события"""
+        compiled_events = self.compile_events()
+        if not compiled_events:
+            return
+        check_durations([event for event, _, _ in compiled_events])
+
+        log = self.log
+        results = self.results
+        state = self.state
+        time = 0
+        if self.checkpoint is not None:
+            time = yield from self.resume(compiled_events)
+            if time is None:
+                return
+        cycle = 0
+        cycle_states = {}
+        # сдвиг периода на number * period совпадает с пошаговым сложением длительностей только
+        # для целых чисел; дробные длительности накапливают ошибки округления, поэтому для них
+        # периоды не повторяются, а моделируются по шагам
+        detect_steady_state = self.detect_steady_state and is_integral(time) and \
+            all(is_integral(event.duration) for event, _, _ in compiled_events)
+        # состояние занимает 8 байт на ресурс; число состояний ограничено по памяти, а не по количеству
+        max_cycle_states = max(self.max_cycle_bytes // (8 * max(len(state), 1)), 1)
+        while True:
+            if detect_steady_state:
+                snapshot = state.snapshot()
+                previous = cycle_states.get(snapshot)
+                if previous is not None:
+                    # состояние повторилось - дальше циклы повторяются с тем же периодом
+                    time = yield from self.repeat_period(previous, time, cycle, compiled_events)
+                    cycle_states.clear()
+                elif len(cycle_states) >= max_cycle_states:
+                    cycle_states.clear()
+                cycle_states[snapshot] = (time, cycle, results.offset + len(results), log.offset + len(log))
+            cycle += 1
+
+            time = yield from self.run_events(compiled_events, 0, time)
+            if time is None:
+                return
+
+    def run_events(self, compiled_events: list, start_index: int, time: float):
+        """Выполняет события цикла, начиная с start_index, останавливаясь после каждого.
+        Возвращает время окончания цикла или None, если время симуляции истекло"""
+        log = self.log
+        time_limit = self.time_limit
+        for index in range(start_index, len(compiled_events)):
+            event, operations_in, operations_out = compiled_events[index]
+            self.event_index, self.event_start = index, time
+            self.event_count += 1
+            if log.is_full:
+                log.records.append((EventCode.NODE_START, event.name, time))
+            if operations_in:
+                self.change_resources(operations_in, time)
+            self.cost += event.cost
+
+            time_end = time + event.duration
+            # окончание в момент завершения симуляции не обрабатывается
+            if time_end >= time_limit:
+                return None
+            if operations_out:
+                self.change_resources(operations_out, time_end)
+            if log.is_full:
+                log.records.append((EventCode.NODE_END, event.name, time_end))
+                log.records.append((EventCode.SEPARATOR,))
+            time = time_end
+            yield
+        return time
+
+    def resume(self, compiled_events: list):
+        """Завершает событие, выполнявшееся в контрольной точке, и оставшиеся события его цикла.
+        Возвращает время окончания цикла или None, если время симуляции истекло"""
+        index = self.checkpoint['event_index']
+        time = self.checkpoint['time']
+        event, _, operations_out = compiled_events[index]
+        self.event_index, self.event_start = index, time
+
+        time_end = time + event.duration
+        if time_end >= self.time_limit:
+            return None
+        if operations_out:
+            self.change_resources(operations_out, time_end)
+        if self.log.is_full:
+            self.log.records.append((EventCode.NODE_END, event.name, time_end))
+            self.log.records.append((EventCode.SEPARATOR,))
+        yield
+        return (yield from self.run_events(compiled_events, index + 1, time_end))
+
+    def repeat_period(self, previous: tuple, time: float, cycle: int, compiled_events: list):
+        """Повторяет результаты периода между двумя одинаковыми состояниями ресурсов
+        столько раз, сколько полных периодов помещается до конца симуляции.
+        Возвращает время, с которого симуляция продолжается обычным образом"""
+        previous_time, previous_cycle, results_start, log_start = previous
+        period = time - previous_time
+        # полные периоды, все события которых заканчиваются до конца симуляции
+        count = (self.time_limit - time) // period
+        if time + count * period >= self.time_limit:
+            count -= 1
+        # часть результатов периода могла быть уже отдана и удалена при потоковой выдаче
+        if count <= 0 or results_start < self.results.offset or log_start < self.log.offset:
+            return time
+
+        results_segment = self.results.get_segment(results_start)
+        log_segment = self.log.get_segment(log_start) if self.log.is_full else []
+        event_costs = [event.cost for event, _, _ in compiled_events] * (cycle - previous_cycle)
+        for number in range(1, int(count) + 1):
+            self.results.add_segment(results_segment, number * period)
+            if log_segment:
+                self.log.add_segment(log_segment, number * period)
+            # затраты суммируются по событиям, чтобы итог не отличался от пошагового расчета
+            for event_cost in event_costs:
+                self.cost += event_cost
+            self.event_count += len(event_costs)
+            yield
+        return time + count * period
+
+class CompiledSimulationRun(FastSimulationRun):
+    """Запуск симуляции, в котором полные циклы событий выполняются одной сгенерированной функцией
+    (см. simulation/codegen.py). Цикл после контрольной точки и последний неполный цикл
+    выполняются как в FastSimulationRun. Результаты совпадают с результатами SimulationRun"""
+
+    def run_events(self, compiled_events: list, start_index: int, time: float):
+        """Выполняет события цикла, начиная с start_index. Полный цикл выполняется за один шаг.
+        Возвращает время окончания цикла или None, если время симуляции истекло"""
+        cycle = get_cycle(self.plan, self.log.is_full)
+        if start_index > 0 or not cycle.fits(time, self.time_limit):
+            return (yield from super().run_events(compiled_events, start_index, time))
+        results = self.results
+        self.event_start, time, self.cost = cycle.function(
+            self.state.values, time, self.cost, results.times.append, results.res_indexes.append,
+            results.values.append, self.log.add_errors, self.log.records.append)
+        self.event_index = len(compiled_events) - 1
+        self.event_count += len(compiled_events)
+        yield
+        return time
+
+def create_simulation_run(events: [], time_limit: int, sub_area_resources: [Resource],
+                          report_level: ReportLevel = ReportLevel.FULL,
+                          engine: SimulationEngine = SimulationEngine.SIMPY,
+                          checkpoint: dict = None, plan: ModelPlan = None) -> SimulationRun:
+    """Создает запуск симуляции на выбранном движке"""
+    run_class = {SimulationEngine.FAST: FastSimulationRun,
+                 SimulationEngine.COMPILED: CompiledSimulationRun}.get(engine, SimulationRun)
+    return run_class(events, time_limit, sub_area_resources, report_level, checkpoint, plan)
+
+def get_report(events: [], time_limit: int, sub_area_resources: [Resource],
+               report_level: ReportLevel = ReportLevel.FULL, engine: SimulationEngine = SimulationEngine.SIMPY,
+               checkpoint: dict = None, plan: ModelPlan = None):
     """Возвращает отчет по симуляции"""
-    global report, current_res_values, simulation_res_table, table_for_export
-    #очищаем предыдущие результаты эксперимента
-    report.clear()
-    simulation_res_table.clear()
-    table_for_export.clear()
-
-    #заполняем словарь для хранения текущих значений ресурсов во время симуляции
-    fill_current_res_values_dict(sub_area_resources)
-
-    #устанавливаем заголовки в таблицу для дальнейшего экспорта в csv/xlsx
-    set_export_table_headers(sub_area_resources)
-
-    env = simpy.Environment()
-    #запускаем симуляцию
-    env.process(start(env, events))
-    env.run(until=time_limit)
-    report.append(f'Конец симуляции')
-    report.append(f'Время симуляции - {time_limit}')
-    report.append(f'Общие затраты: {cost}')
-    return report, simulation_res_table, table_for_export
\ No newline at end of file
+    return create_simulation_run(events, time_limit, sub_area_resources, report_level, engine,
+                                 checkpoint, plan).run()
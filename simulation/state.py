@@ -0,0 +1,56 @@
+import math
+from array import array
+
+def to_state_value(value) -> float:
+    """Возвращает значение для массива состояния; отсутствующее значение хранится как NaN"""
+    return math.nan if value is None else value
+
+def from_state_value(value: float):
+    """Возвращает значение из массива состояния (NaN заменяется на None)"""
+    return None if math.isnan(value) else value
+
+class ResourceState:
+    """Состояние ресурсов ПО во время симуляции.
+
+    Каждому ресурсу назначен номер (слот) в порядке ресурсов ПО. Текущие значения и пределы
+    хранятся в непрерывных массивах float по этим номерам, поэтому состояние быстро копируется,
+    сравнивается и передается в другие процессы"""
+    __slots__ = ('ids', 'names', 'sys_names', 'slots', 'values', 'min_values', 'max_values')
+
+    def __init__(self, sub_area_resources: [] = ()):
+        # при совпадении системных имен используется последний ресурс, а номер - первого
+        resources = list({res.sys_name: res for res in sub_area_resources}.values())
+        self.ids = tuple(res.id for res in resources)
+        self.names = tuple(res.name for res in resources)
+        self.sys_names = tuple(res.sys_name for res in resources)
+        self.slots = {sys_name: slot for slot, sys_name in enumerate(self.sys_names)}
+        self.values = array('d', [to_state_value(res.current_value) for res in resources])
+        self.min_values = array('d', [to_state_value(res.min_value) for res in resources])
+        self.max_values = array('d', [to_state_value(res.max_value) for res in resources])
+
+    def __len__(self):
+        return len(self.values)
+
+    def copy(self) -> 'ResourceState':
+        """Возвращает копию состояния для нового запуска"""
+        state = ResourceState()
+        state.ids, state.names, state.sys_names, state.slots = self.ids, self.names, self.sys_names, self.slots
+        state.values = array('d', self.values)
+        # пределы не меняются во время симуляции, поэтому массивы общие
+        state.min_values, state.max_values = self.min_values, self.max_values
+        return state
+
+    def snapshot(self) -> bytes:
+        """Возвращает текущие значения ресурсов в виде байтов для сравнения состояний"""
+        return self.values.tobytes()
+
+    def get_values(self) -> dict:
+        """Возвращает текущие значения ресурсов по системным именам"""
+        return {sys_name: from_state_value(value) for sys_name, value in zip(self.sys_names, self.values)}
+
+    def set_values(self, values: dict):
+        """Устанавливает текущие значения ресурсов по системным именам; неизвестные имена пропускаются"""
+        for sys_name, value in values.items():
+            slot = self.slots.get(sys_name)
+            if slot is not None:
+                self.values[slot] = to_state_value(value)
@@ -0,0 +1,111 @@
+import io
+import math
+from itertools import islice
+
+from sqlalchemy import insert, select, update, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db.models import DataVersion as ModelDataVersion
+from db.models import SimulationRun as ModelSimulationRun
+from db.models import SimulationSample as ModelSimulationSample
+from db.models import Resource as ModelResource
+from simulation.results import SimulationResults
+
+SAMPLE_COLUMNS = ('run_id', 'seq', 'time', 'res_id', 'value')
+#количество изменений ресурсов, записываемых в БД за один раз
+BATCH_SIZE = 10000
+
+#id единственной строки таблицы data_versions
+DATA_VERSION_ID = 1
+
+class DatabaseGeneration:
+    """Версия данных для кэша планов моделей, хранимая в таблице data_versions.
+    Общая для всех процессов и серверов, работающих с БД; проверка - один запрос по ключу"""
+
+    def __init__(self, get_session):
+        #функция, возвращающая сессию текущего запроса
+        self.get_session = get_session
+
+    def get(self) -> str:
+        version = self.get_session().execute(select(ModelDataVersion.version)
+                                             .where(ModelDataVersion.id == DATA_VERSION_ID)).scalar()
+        return str(version or 0)
+
+    def bump(self):
+        session = self.get_session()
+        statement = (update(ModelDataVersion).where(ModelDataVersion.id == DATA_VERSION_ID)
+                     .values(version=ModelDataVersion.version + 1))
+        if session.execute(statement).rowcount == 0:
+            # первое изменение: строки еще нет; ее может одновременно добавить другой процесс
+            try:
+                session.add(ModelDataVersion(id=DATA_VERSION_ID, version=1))
+                session.commit()
+                return
+            except IntegrityError:
+                session.rollback()
+                session.execute(statement)
+        session.commit()
+
+def get_sample_rows(run_id: int, results: SimulationResults):
+    """Возвращает строки таблицы simulation_samples по хранилищу изменений ресурсов"""
+    ids = results.ids
+    for seq, (time, index, value) in enumerate(zip(results.times, results.res_indexes, results.values)):
+        yield run_id, seq, time, ids[index], value
+
+def to_copy_value(value) -> str:
+    """Преобразует значение в текстовый формат COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, float) and math.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    return repr(value)
+
+def insert_samples(session: Session, rows):
+    """Записывает изменения ресурсов пакетами. Для PostgreSQL используется COPY,
+    для остальных БД - вставка нескольких строк одним запросом"""
+    connection = session.connection()
+    driver = connection.dialect.driver
+    copy_sql = f"COPY simulation_samples ({', '.join(SAMPLE_COLUMNS)}) FROM STDIN"
+    if driver == 'psycopg':
+        with connection.connection.driver_connection.cursor() as cursor:
+            with cursor.copy(copy_sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        return
+    while batch := list(islice(rows, BATCH_SIZE)):
+        if driver == 'psycopg2':
+            buffer = io.StringIO()
+            for row in batch:
+                buffer.write('\t'.join(to_copy_value(value) for value in row) + '\n')
+            buffer.seek(0)
+            with connection.connection.driver_connection.cursor() as cursor:
+                cursor.copy_expert(copy_sql, buffer)
+        else:
+            session.execute(insert(ModelSimulationSample), [dict(zip(SAMPLE_COLUMNS, row)) for row in batch])
+
+def save_simulation_run(session: Session, sub_area_id: int, model_id: int, time_limit: int, engine: str,
+                        cost: float, results: SimulationResults, checkpoint: dict) -> ModelSimulationRun:
+    """Сохраняет запуск симуляции и все изменения ресурсов в одной транзакции"""
+    run = ModelSimulationRun(model_id=model_id, sub_area_id=sub_area_id, time_limit=time_limit, engine=engine,
+                             cost=cost, sample_count=len(results), checkpoint=checkpoint)
+    session.add(run)
+    session.flush()
+    insert_samples(session, get_sample_rows(run.id, results))
+    session.commit()
+    return run
+
+def get_samples_page(session: Session, run_id: int, after: int, limit: int) -> dict:
+    """Возвращает изменения ресурсов запуска с номерами больше after (постраничная выдача по ключу)"""
+    samples = (session.query(ModelSimulationSample, ModelResource.name, ModelResource.sys_name)
+               .outerjoin(ModelResource, ModelResource.id == ModelSimulationSample.res_id)
+               .filter(and_(ModelSimulationSample.run_id == run_id, ModelSimulationSample.seq > after))
+               .order_by(ModelSimulationSample.seq)
+               .limit(limit)
+               .all())
+    data = [{'seq': sample.seq, 'id': sample.res_id, 'name': name, 'sys_name': sys_name,
+             'value': sample.value, 'time': sample.time}
+            for sample, name, sys_name in samples]
+    # ключ следующей страницы; None - записей больше нет
+    next_after = data[-1]['seq'] if len(data) == limit else None
+    return {"data": data, "next": next_after}
@@ -0,0 +1,147 @@
+import numpy as np
+
+from simulation.formula import compile_formulas
+from simulation.state import ResourceState
+
+def repeat_for_scenarios(values: [], count: int) -> np.ndarray:
+    """Возвращает матрицу, в которой значения повторены для каждого сценария"""
+    return np.repeat(np.array(values, dtype=float).reshape(-1, 1), count, axis=1)
+
+def to_json_value(value: float):
+    """Преобразует число в значение для JSON (NaN заменяется на null)"""
+    return None if np.isnan(value) else float(value)
+
+def to_json_list(values: np.ndarray) -> list:
+    """Преобразует массив в список для JSON (NaN заменяется на null)"""
+    return np.where(np.isnan(values), None, values).tolist()
+
+class ScenarioSweep:
+    """Серия сценариев одной модели, которые моделируются одновременно.
+
+    Состояние всех сценариев хранится в массивах (ресурс x сценарий),
+    поэтому каждая операция над ресурсом выполняется сразу для всех сценариев"""
+
+    def __init__(self, events: [], time_limit: int, sub_area_resources: [], count: int,
+                 include_series: bool = False, max_series_values: int = None):
+        self.events = events
+        self.time_limit = time_limit
+        self.include_series = include_series
+        #наибольшее число сохраняемых изменений ресурсов по всем сценариям (None - без ограничения)
+        self.max_series_values = max_series_values
+        self.state = ResourceState(sub_area_resources)
+
+        #начальные значения и пределы ресурсов для каждого сценария (номер ресурса x сценарий)
+        self.values = repeat_for_scenarios(self.state.values, count)
+        self.min_values = repeat_for_scenarios(self.state.min_values, count)
+        self.max_values = repeat_for_scenarios(self.state.max_values, count)
+        #длительности и затраты событий для каждого сценария
+        self.durations = repeat_for_scenarios([event.duration for event in events], count)
+        self.costs = repeat_for_scenarios([event.cost for event in events], count)
+
+        self.cost = np.zeros(count)
+        self.event_count = np.zeros(count, dtype=int)
+        self.series = []
+
+    def apply_scenarios(self, scenarios: []):
+        """Переопределяет значения ресурсов и свойства узлов для каждого сценария"""
+        event_indexes = {event.id: index for index, event in enumerate(self.events)}
+        for number, scenario in enumerate(scenarios):
+            for sys_name, resource in scenario.resources.items():
+                if sys_name not in self.state.slots:
+                    raise ValueError(f"Ресурс '{sys_name}' не найден в предметной области")
+                index = self.state.slots[sys_name]
+                for field, matrix in (('current_value', self.values), ('min_value', self.min_values),
+                                      ('max_value', self.max_values)):
+                    value = getattr(resource, field)
+                    if value is not None:
+                        matrix[index, number] = value
+            for node_id, node in scenario.nodes.items():
+                if node_id not in event_indexes:
+                    raise ValueError(f"Узел с id {node_id} не найден в модели")
+                if node.duration is not None:
+                    self.durations[event_indexes[node_id], number] = node.duration
+                if node.cost is not None:
+                    self.costs[event_indexes[node_id], number] = node.cost
+
+    def get_durations(self, index: int) -> np.ndarray:
+        """Возвращает длительности события во всех сценариях"""
+        return self.durations[index]
+
+    def get_costs(self, index: int) -> np.ndarray:
+        """Возвращает затраты события во всех сценариях"""
+        return self.costs[index]
+
+    def before_changes(self, time: np.ndarray):
+        """Вызывается перед изменением ресурсов в момент времени time"""
+
+    def change_resources(self, operations: [], time: np.ndarray, active: np.ndarray):
+        """Выполняет операции над ресурсами сразу для всех активных сценариев"""
+        values = self.values
+        for operation in operations:
+            if operation.errors or operation.function is None:
+                continue
+            target = operation.target
+            operand = operation.operand if operation.operand_res is None else values[operation.operand_res]
+            new_values = operation.function(values[operation.source], operand)
+            min_values, max_values = self.min_values[target], self.max_values[target]
+            new_values = np.where(new_values < min_values, min_values,
+                                  np.where(new_values > max_values, max_values, new_values))
+            values[target] = np.where(active, new_values, values[target])
+            if self.include_series:
+                if self.max_series_values is not None and \
+                        (len(self.series) + 1) * len(time) > self.max_series_values:
+                    raise ValueError(f"Число изменений ресурсов по всем сценариям превышает {self.max_series_values}: "
+                                     "уменьшите время симуляции или число сценариев либо отключите include_series")
+                self.series.append((target, time.copy(), values[target].copy(), active.copy()))
+
+    def run(self) -> dict:
+        """Моделирует все сценарии до окончания времени симуляции"""
+        compiled_events = [(compile_formulas(event.db_resources_in, self.state),
+                            compile_formulas(event.db_resources_out, self.state))
+                           for event in self.events]
+        if not compiled_events:
+            return self.get_results()
+        if (self.durations < 0).any():
+            raise ValueError("Длительность узла не может быть отрицательной")
+        if (self.durations.sum(axis=0) <= 0).any():
+            raise ValueError("Суммарная длительность узлов модели должна быть больше нуля")
+
+        time = np.zeros(self.values.shape[1])
+        active = time < self.time_limit
+        index = 0
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            # события всех сценариев выполняются в одном порядке, отличается только время
+            while active.any():
+                operations_in, operations_out = compiled_events[index]
+                self.before_changes(time)
+                self.change_resources(operations_in, time, active)
+                self.cost += np.where(active, self.get_costs(index), 0.0)
+                self.event_count += active
+
+                time_end = time + self.get_durations(index)
+                # окончание в момент завершения симуляции не обрабатывается
+                active = active & (time_end < self.time_limit)
+                self.before_changes(time_end)
+                self.change_resources(operations_out, time_end, active)
+                time = np.where(active, time_end, time)
+                index = (index + 1) % len(compiled_events)
+        return self.get_results()
+
+    def get_results(self) -> dict:
+        """Возвращает итоги по каждому сценарию и, если нужно, изменения ресурсов"""
+        sys_names = self.state.sys_names
+        scenarios = []
+        for number in range(self.values.shape[1]):
+            scenarios.append({
+                "cost": float(self.cost[number]),
+                "event_count": int(self.event_count[number]),
+                "final_values": {sys_name: to_json_value(value)
+                                 for sys_name, value in zip(sys_names, self.values[:, number])},
+            })
+
+        if self.include_series:
+            for number, scenario in enumerate(scenarios):
+                scenario["series"] = [{'sys_name': sys_names[target], 'time': float(time[number]),
+                                       'value': to_json_value(values[number])}
+                                      for target, time, values, active in self.series if active[number]]
+        return {"time_limit": self.time_limit, "scenarios": scenarios}
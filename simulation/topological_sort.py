@@ -1,5 +1,13 @@
+import heapq
 from collections import defaultdict
 
+class CycleError(ValueError):
+    """Граф модели содержит цикл"""
+
+    def __init__(self, cycle: list):
+        self.cycle = cycle
+        super().__init__(f"Модель содержит цикл: {' -> '.join(str(v) for v in cycle)}")
+
 class Graph:
     def __init__(self):
         self.graph = defaultdict(list)
@@ -11,45 +19,74 @@ class Graph:
         self.vertices.add(u)
         self.vertices.add(v)
 
+    def add_vertex(self, v):
+        """Добавление вершины без ребер"""
+        self.vertices.add(v)
+
     def topological_sort(self):
         """
-        Выполняет топологическую сортировку линейного графа
+        Выполняет топологическую сортировку графа алгоритмом Кана (без рекурсии).
+        Из нескольких доступных вершин первой берется вершина с меньшим id,
+        поэтому порядок не зависит от порядка добавления ребер.
+        Если в графе есть цикл, выбрасывает CycleError
         """
-        # Список для хранения результата
-        result = []
-        # Отметки посещения вершин
-        visited = {v: False for v in self.vertices}
+        in_degree = {v: 0 for v in self.vertices}
+        for u in self.graph:
+            for v in self.graph[u]:
+                in_degree[v] += 1
 
-        def dfs_util(v):
-            visited[v] = True
-
-            # Рекурсия для всех смежных вершин
-            for i in self.graph[v]:
-                if not visited[i]:
-                    dfs_util(i)
-
-            # Добавляем вершину в результат
-            result.append(v)
-
-        # Выполняем DFS только для используемых вершин
-        for v in self.vertices:
-            if not visited[v]:
-                dfs_util(v)
+        # вершины, все предшественники которых уже в результате
+        available = [v for v, degree in in_degree.items() if degree == 0]
+        heapq.heapify(available)
+        result = []
+        while available:
+            u = heapq.heappop(available)
+            result.append(u)
+            for v in self.graph.get(u, ()):
+                in_degree[v] -= 1
+                if in_degree[v] == 0:
+                    heapq.heappush(available, v)
 
-        # Получаем правильный порядок (реверсируем список)
-        result.reverse()
+        if len(result) < len(self.vertices):
+            raise CycleError(self.find_cycle(v for v, degree in in_degree.items() if degree > 0))
         return result
 
-def create_graph(relations: []):
-    """Создает из списка связей модели линейный граф"""
+    def find_cycle(self, remaining) -> list:
+        """Возвращает один из циклов среди вершин, не попавших в сортировку"""
+        remaining = set(remaining)
+        # у каждой такой вершины есть предшественник среди них же, поэтому идем по обратным ребрам
+        predecessors = {}
+        for u in self.graph:
+            if u in remaining:
+                for v in self.graph[u]:
+                    if v in remaining:
+                        predecessors.setdefault(v, u)
+        path = [min(remaining)]
+        positions = {path[0]: 0}
+        while True:
+            u = predecessors[path[-1]]
+            if u in positions:
+                cycle = path[positions[u]:]
+                cycle.reverse()
+                # цикл начинается с вершины с меньшим id
+                start = cycle.index(min(cycle))
+                cycle = cycle[start:] + cycle[:start]
+                return cycle + [cycle[0]]
+            positions[u] = len(path)
+            path.append(u)
+
+def create_graph(relations: [], node_ids: [] = ()):
+    """Создает граф модели из списка связей и узлов, в том числе не связанных с другими"""
     # Создаём граф и добавляем рёбра
     graph = Graph()
     edges = [(relation.source_id, relation.target_id) for relation in relations]
     for u, v in edges:
         graph.add_edge(u, v)
+    for node_id in node_ids:
+        graph.add_vertex(node_id)
     return graph
 
-def get_sorted_node_ids(relations: []):
+def get_sorted_node_ids(relations: [], node_ids: [] = ()):
     """Возвращает отсортированный список id узлов"""
-    graph = create_graph(relations)
-    return graph.topological_sort()
\ No newline at end of file
+    graph = create_graph(relations, node_ids)
+    return graph.topological_sort()
@@ -9,10 +9,27 @@ class SimulationRes:
         self.time = time
 
 class SimulationNodedata:
-    def __init__(self, id: int, name: str, cost: int, duration: int, resources_in: [NodeRes], resources_out: [NodeRes]):
+    def __init__(self, id: int, name: str, cost: int, duration: int, resources_in: [NodeRes], resources_out: [NodeRes],
+                 duration_spec: str = None):
         self.id = id
         self.name = name
         self.cost = cost
         self.duration = duration
+        # описание длительности из БД (число или распределение)
+        self.duration_spec = duration_spec
         self.db_resources_in = resources_in
-        self.db_resources_out = resources_out
\ No newline at end of file
+        self.db_resources_out = resources_out
+
+class SimulationNodeRes:
+    def __init__(self, id: int, value: str):
+        self.id = id
+        self.value = value
+
+class SimulationResource:
+    def __init__(self, id: int, name: str, sys_name: str, current_value: float, min_value: float, max_value: float):
+        self.id = id
+        self.name = name
+        self.sys_name = sys_name
+        self.current_value = current_value
+        self.min_value = min_value
+        self.max_value = max_value
@@ -0,0 +1,31 @@
+import unittest
+
+from simulation.distributions import parse_distribution
+
+class ParseDistributionTest(unittest.TestCase):
+
+    def test_degenerate_distributions_are_constant(self):
+        for spec, value in (("normal(5, 0)", 5.0), ("exponential(0)", 0.0), ("uniform(2, 2)", 2.0),
+                            ("triangular(1, 1, 1)", 1.0)):
+            with self.subTest(spec=spec):
+                distribution = parse_distribution(spec)
+                self.assertTrue(distribution.is_constant)
+                self.assertEqual(distribution.mean, value)
+
+    def test_random_distributions(self):
+        for spec, mean in (("normal(5, 1)", 5.0), ("exponential(2)", 2.0), ("uniform(1, 2)", 1.5),
+                           ("triangular(0, 3, 6)", 3.0)):
+            with self.subTest(spec=spec):
+                distribution = parse_distribution(spec)
+                self.assertFalse(distribution.is_constant)
+                self.assertEqual(distribution.mean, mean)
+
+    def test_invalid_specs(self):
+        for spec in ("poisson(1)", "normal(1)", "normal(5, -1)", "uniform(3, 1)", "triangular(0, 5, 4)",
+                     "uniform(a, b)"):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse_distribution(spec)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import random
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from shared.enums.report_levels import ReportLevel
+from shared.enums.simulation_engines import SimulationEngine
+from simulation.sim import get_events_list, get_report, create_simulation_run, FastSimulationRun
+from simulation.types import SimulationNodedata, SimulationNodeRes, SimulationResource
+
+#связь узлов в том виде, в котором ее загружает simulation.loader
+Relation = namedtuple("Relation", ("source_id", "target_id"))
+#движки, результаты которых должны совпадать с simpy
+ENGINES = (SimulationEngine.FAST, SimulationEngine.COMPILED)
+
+def simulate(nodes: [], relations: [], resources: [], time_limit: int, engine: SimulationEngine,
+             report_level: ReportLevel = ReportLevel.FULL, checkpoint: dict = None) -> tuple:
+    """Возвращает отчет, таблицы графика и экспорта и контрольную точку симуляции"""
+    event_log, results, next_checkpoint = get_report(get_events_list(nodes, relations), time_limit, resources,
+                                                     report_level, engine, checkpoint=checkpoint)
+    return event_log.render(), results.get_chart_table(), results.get_export_table(), next_checkpoint
+
+def generate_model(seed: int, node_count: int, durations: tuple = tuple(range(1, 8))) -> tuple:
+    """Создает случайную модель-цепочку: узлы с формулами, связи между соседними узлами и ресурсы ПО.
+    Формулы могут ссылаться на неизвестный ресурс, чтобы в отчет попадали ошибки"""
+    rnd = random.Random(seed)
+    resources = [SimulationResource(id=number, name=f"Ресурс {number}", sys_name=f"{'MFT'[number % 3]}Res{number}",
+                                    current_value=float(rnd.randint(1, 50)), min_value=1.0,
+                                    max_value=float(rnd.choice([60, 100, 1000])))
+                 for number in range(1, 6)]
+    sys_names = [res.sys_name for res in resources] + ["XRes99"]
+    formula_id = 0
+
+    def get_formulas() -> [SimulationNodeRes]:
+        nonlocal formula_id
+        formulas = []
+        for _ in range(rnd.randint(0, 2)):
+            operation = rnd.choice("+-*/")
+            if rnd.random() < 0.3:
+                operand = rnd.choice(sys_names[:-1])
+            elif operation in "*/":
+                operand = rnd.choice(["0.5", "1", "2", "3"])
+            else:
+                operand = str(rnd.randint(1, 9))
+            target = sys_names[-1] if rnd.random() < 0.05 else rnd.choice(sys_names[:-1])
+            formula_id += 1
+            formulas.append(SimulationNodeRes(id=formula_id,
+                                              value=f"{target}:={rnd.choice(sys_names[:-1])}{operation}{operand}"))
+        return formulas
+
+    nodes = [SimulationNodedata(id=100 + number, name=f"Узел {number}", cost=float(rnd.randint(0, 5)),
+                                duration=rnd.choice(durations), resources_in=get_formulas(),
+                                resources_out=get_formulas())
+             for number in range(node_count)]
+    if sum(node.duration for node in nodes) == 0:
+        nodes[0].duration = 1
+    relations = [Relation(100 + number, 101 + number) for number in range(node_count - 1)]
+    return nodes, relations, resources
+
+class EngineConformanceTest(unittest.TestCase):
+    """Движки fast и compiled должны давать те же отчет, таблицы и контрольную точку, что и simpy"""
+
+    def assert_conforms(self, model: tuple, time_limit: int, report_level: ReportLevel = ReportLevel.FULL,
+                        checkpoint: dict = None):
+        expected = simulate(*model, time_limit, SimulationEngine.SIMPY, report_level, checkpoint)
+        for engine in ENGINES:
+            with self.subTest(engine=engine.value, time_limit=time_limit, report_level=report_level.name):
+                self.assertEqual(simulate(*model, time_limit, engine, report_level, checkpoint), expected)
+
+    def test_generated_models(self):
+        for seed in range(30):
+            model = generate_model(seed, random.Random(seed).choice([1, 3, 6, 12]))
+            for report_level in ReportLevel:
+                self.assert_conforms(model, random.Random(seed).choice([1, 7, 50, 501, 1000]), report_level)
+
+    def test_without_steady_state(self):
+        with mock.patch.object(FastSimulationRun, "detect_steady_state", False):
+            for seed in range(10):
+                self.assert_conforms(generate_model(seed, 6), 1000)
+
+    def test_small_steady_state_memory(self):
+        # запоминается не больше одного состояния ресурсов, поэтому периоды почти не находятся
+        with mock.patch.object(FastSimulationRun, "max_cycle_bytes", 8):
+            for seed in range(10):
+                self.assert_conforms(generate_model(seed, 6), 1000)
+
+    def test_fractional_durations(self):
+        for seed in range(10):
+            self.assert_conforms(generate_model(seed, 5, durations=(0.1, 0.25, 0.3, 1.5)), 100)
+
+    def test_zero_durations(self):
+        for seed in range(10):
+            self.assert_conforms(generate_model(seed, 6, durations=(0, 0, 1, 2)), 300)
+
+    def test_checkpoint_resume(self):
+        for seed in range(10):
+            model = generate_model(seed, 6)
+            _, _, _, checkpoint = simulate(*model, 173, SimulationEngine.SIMPY)
+            for report_level in ReportLevel:
+                self.assert_conforms(model, 1000, report_level, checkpoint)
+            # продолжение с контрольной точки заканчивается в том же состоянии, что и запуск целиком
+            self.assertEqual(simulate(*model, 1000, SimulationEngine.SIMPY, checkpoint=checkpoint)[3],
+                             simulate(*model, 1000, SimulationEngine.SIMPY)[3])
+
+    def test_stream(self):
+        for seed in range(5):
+            nodes, relations, resources = generate_model(seed, 6)
+            expected = simulate(nodes, relations, resources, 500, SimulationEngine.SIMPY)
+            for engine in (SimulationEngine.SIMPY,) + ENGINES:
+                with self.subTest(seed=seed, engine=engine.value):
+                    chunks = list(create_simulation_run(get_events_list(nodes, relations), 500, resources,
+                                                        ReportLevel.FULL, engine).stream(50))
+                    streamed = (sum((chunk["report"] for chunk in chunks), []),
+                                sum((chunk["chart_table"] for chunk in chunks), []),
+                                sum((chunk["export_table"] for chunk in chunks), []),
+                                chunks[-1]["checkpoint"])
+                    self.assertEqual(streamed, expected)
+
+    def test_event_count(self):
+        for seed in range(10):
+            nodes, relations, resources = generate_model(seed, 6)
+            runs = {engine: create_simulation_run(get_events_list(nodes, relations), 1000, resources,
+                                                  ReportLevel.NONE, engine) for engine in SimulationEngine}
+            for simulation_run in runs.values():
+                simulation_run.run()
+            expected = runs[SimulationEngine.SIMPY].event_count
+            self.assertGreater(expected, 0)
+            for engine in ENGINES:
+                with self.subTest(seed=seed, engine=engine.value):
+                    self.assertEqual(runs[engine].event_count, expected)
+
+    def test_invalid_durations(self):
+        nodes, relations, resources = generate_model(0, 3, durations=(0,))
+        nodes[0].duration = 0
+        for engine in ENGINES:
+            with self.subTest(engine=engine.value):
+                with self.assertRaises(ValueError):
+                    simulate(nodes, relations, resources, 10, engine)
+                nodes[1].duration = -1
+                with self.assertRaises(ValueError):
+                    simulate(nodes, relations, resources, 10, engine)
+                nodes[1].duration = 0
+
+class FractionalDurationTest(unittest.TestCase):
+    """Периоды установившегося режима с дробными длительностями не должны сдвигать время событий"""
+
+    def test_single_node(self):
+        # ресурс достигает максимума, после чего состояние повторяется каждый цикл
+        nodes = [SimulationNodedata(id=1, name="Узел", cost=1.0, duration=0.1, resources_in=[],
+                                    resources_out=[SimulationNodeRes(id=1, value="MRes1:=MRes1+1")])]
+        resources = [SimulationResource(id=1, name="Ресурс", sys_name="MRes1", current_value=0.0,
+                                        min_value=0.0, max_value=5.0)]
+        expected = simulate(nodes, [], resources, 2, SimulationEngine.SIMPY)
+        self.assertEqual(len(expected[1]), 19)
+        self.assertEqual(expected[3]['cost'], 20.0)
+        for engine in ENGINES:
+            with self.subTest(engine=engine.value):
+                self.assertEqual(simulate(nodes, [], resources, 2, engine), expected)
+
+if __name__ == '__main__':
+    unittest.main()
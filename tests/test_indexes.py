@@ -0,0 +1,83 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+import shared.validation as validation
+from db.database import Base
+from db.models import Chart, Model, ModelControl, Node, NodeDetail, NodeRes, Relation, Resource
+from db.models import SimulationRun, SimulationSample
+from db.schemas import Node as SchemaNode
+from db.schemas import Resource as SchemaRes
+from simulation.loader import load_model
+
+class IndexUsageTest(unittest.TestCase):
+    """Частые запросы должны находить строки по индексу, а не просматривать таблицу целиком.
+    Планы запросов проверяются через EXPLAIN QUERY PLAN в SQLite"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.record_statement)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def record_statement(self, connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def assert_uses_indexes(self, query, expected_count: int = 1):
+        """Выполняет query и проверяет, что ни один из выполненных запросов не просматривает таблицу целиком"""
+        self.statements.clear()
+        query()
+        statements = list(self.statements)
+        self.assertEqual(len(statements), expected_count)
+        with self.engine.connect() as connection:
+            for statement, parameters in statements:
+                plan = [row[3] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement,
+                                                                     parameters)]
+                with self.subTest(statement=" ".join(statement.split())):
+                    self.assertTrue(any(detail.startswith("SEARCH") for detail in plan), plan)
+                    self.assertFalse([detail for detail in plan if detail.startswith("SCAN")], plan)
+
+    def test_list_queries(self):
+        session = self.session
+        queries = [
+            lambda: session.query(Model).filter((Model.sub_area_id == 1)).all(),
+            lambda: session.query(Node).filter(Node.model_id == 1).all(),
+            lambda: session.query(Relation).filter_by(model_id=1).all(),
+            lambda: session.query(NodeDetail).filter(NodeDetail.node_id == 1).first(),
+            lambda: session.query(Resource).filter(Resource.sub_area_id == 1).all(),
+            lambda: session.query(NodeRes).filter(NodeRes.node_id == 1).all(),
+            lambda: session.query(ModelControl).filter(ModelControl.model_id == 1).all(),
+            lambda: session.query(Chart).filter(Chart.model_id == 1).all(),
+            lambda: session.query(SimulationRun).filter(SimulationRun.model_id == 1, SimulationRun.id < 10)
+                           .order_by(SimulationRun.id.desc()).limit(50).all(),
+            lambda: session.query(SimulationSample).filter(SimulationSample.run_id == 1, SimulationSample.seq > 0)
+                           .order_by(SimulationSample.seq).limit(1000).all(),
+        ]
+        for query in queries:
+            self.assert_uses_indexes(query)
+
+    def test_uniqueness_checks(self):
+        checks = [
+            lambda: validation.check_sub_area_name_unique("ПО"),
+            lambda: validation.check_model_name_unique("Модель", 1),
+            lambda: validation.check_resource_name_unique(SchemaRes(name="Ресурс", type_id=1, sub_area_id=1)),
+            lambda: validation.check_node_name_unique(SchemaNode(name="Узел", model_id=1), 1),
+        ]
+        with mock.patch.object(validation, "db", SimpleNamespace(session=self.session)):
+            for check in checks:
+                self.assert_uses_indexes(check)
+
+    def test_load_model(self):
+        self.assert_uses_indexes(lambda: load_model(self.session, 1, 1), expected_count=5)
+
+if __name__ == '__main__':
+    unittest.main()
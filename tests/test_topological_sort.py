@@ -0,0 +1,47 @@
+import random
+import sys
+import unittest
+from collections import namedtuple
+
+from simulation.topological_sort import CycleError, get_sorted_node_ids
+
+Relation = namedtuple("Relation", ("source_id", "target_id"))
+
+class TopologicalSortTest(unittest.TestCase):
+
+    def test_ties_are_ordered_by_id(self):
+        relations = [Relation(1, 9), Relation(1, 4), Relation(1, 6), Relation(4, 2), Relation(6, 2)]
+        expected = [1, 4, 6, 2, 9]
+        self.assertEqual(get_sorted_node_ids(relations), expected)
+        # порядок не зависит от порядка связей
+        for seed in range(5):
+            shuffled = list(relations)
+            random.Random(seed).shuffle(shuffled)
+            self.assertEqual(get_sorted_node_ids(shuffled), expected)
+
+    def test_isolated_nodes_are_kept(self):
+        relations = [Relation(3, 5)]
+        self.assertEqual(get_sorted_node_ids(relations, [7, 5, 3, 1]), [1, 3, 5, 7])
+        self.assertEqual(get_sorted_node_ids([], [2, 1]), [1, 2])
+
+    def test_cycle_is_named(self):
+        relations = [Relation(1, 2), Relation(2, 3), Relation(3, 4), Relation(4, 2), Relation(4, 9)]
+        with self.assertRaises(CycleError) as context:
+            get_sorted_node_ids(relations, [1, 2, 3, 4, 9])
+        self.assertEqual(context.exception.cycle, [2, 3, 4, 2])
+        self.assertEqual(str(context.exception), "Модель содержит цикл: 2 -> 3 -> 4 -> 2")
+        self.assertIsInstance(context.exception, ValueError)
+
+    def test_self_loop(self):
+        with self.assertRaises(CycleError) as context:
+            get_sorted_node_ids([Relation(1, 2), Relation(5, 5)], [1, 2, 5])
+        self.assertEqual(context.exception.cycle, [5, 5])
+
+    def test_long_chain(self):
+        # сортировка без рекурсии: цепочка длиннее предела рекурсии
+        count = sys.getrecursionlimit() * 20
+        relations = [Relation(node_id, node_id + 1) for node_id in reversed(range(count - 1))]
+        self.assertEqual(get_sorted_node_ids(relations), list(range(count)))
+
+if __name__ == '__main__':
+    unittest.main()